@@ -5,10 +5,17 @@
     'description': 'Module permettant d’ajouter des champs supplémentaires aux équipements de maintenance sans modifier le module natif.',
     'author': 'Imène M',
     'category': 'Maintenance',
-    'depends': ['maintenance', 'stock', 'maintenance_product', 'purchase', 'mail'],
+    'depends': ['maintenance', 'stock', 'maintenance_product', 'purchase', 'purchase_stock', 'mail'],
     'data': [
+        'security/ir.model.access.csv',
+        'data/maintenance_data.xml',
         'views/maintenance_equipment_view.xml',
         'views/maintenance_request_views.xml',
+        'report/maintenance_external_report_views.xml',
+        'data/ir_cron.xml',
+        'data/maintenance_request_actions.xml',
+        'wizard/equipment_generate_wizard_views.xml',
+        'wizard/back_from_vendor_wizard_views.xml',
     ],
     'application': False,
     'installable': True,
@@ -1,2 +1,6 @@
 from . import maintenance_equipment
 from . import maintenance_request
+from . import equipment_purchase_price
+from . import stock_move
+from . import stock_lot
+from . import purchase_order
@@ -0,0 +1,150 @@
+from collections import defaultdict
+
+from odoo import api, fields, models, tools
+from odoo.tools import split_every
+
+
+class MaintenanceEquipmentPurchasePrice(models.Model):
+    """Dernier prix d'achat unitaire TTC (devise société) par (société, produit, lot).
+
+    Alimenté à la validation des réceptions d'achat (stock.move._action_done) ;
+    les clés absentes sont complétées depuis l'historique à la première lecture.
+    Une clé sans aucun achat est mémorisée sans date (entrée négative) pour ne pas
+    relancer la recherche dans stock_move ; la première réception la remplace.
+    """
+    _name = 'maintenance.equipment.purchase.price'
+    _description = "Dernier prix d'achat TTC par produit / lot"
+    _order = 'date desc, id desc'
+
+    company_id = fields.Many2one('res.company', string="Société", required=True, ondelete='cascade')
+    product_id = fields.Many2one('product.product', string="Produit", required=True, ondelete='cascade')
+    lot_id = fields.Many2one('stock.lot', string="Numéro de série", index='btree_not_null', ondelete='cascade')
+    move_id = fields.Many2one('stock.move', string="Mouvement", ondelete='set null')
+    date = fields.Datetime(string="Date de réception")
+    price_ttc = fields.Monetary(string="Prix unitaire TTC", currency_field='currency_id')
+    currency_id = fields.Many2one(related='company_id.currency_id', string="Devise")
+
+    def init(self):
+        # lot_id NULL = prix du produit tous lots confondus
+        tools.create_unique_index(
+            self._cr, 'maintenance_equipment_purchase_price_key_uniq', self._table,
+            ['company_id', 'product_id', 'COALESCE(lot_id, 0)'],
+        )
+
+    @api.model
+    def _get_prices(self, keys):
+        """
+        Prix par clé (product_id, lot_id ou False, company_id) : {clé: price_ttc}.
+        Les clés sans achat connu sont absentes du résultat.
+        """
+        keys = set(keys)
+        if not keys:
+            return {}
+        Price = self.sudo()
+        lot_ids = [k[1] for k in keys if k[1]]
+        product_ids = [k[0] for k in keys if not k[1]]
+        domain = []
+        if lot_ids:
+            domain = [('lot_id', 'in', lot_ids)]
+        if product_ids:
+            plain = [('lot_id', '=', False), ('product_id', 'in', product_ids)]
+            domain = ['|', *domain, '&', *plain] if domain else plain
+        domain = [('company_id', 'in', list({k[2] for k in keys}))] + domain
+
+        prices = {}
+        known = set()
+        for row in Price.search(domain):
+            key = (row.product_id.id, row.lot_id.id or False, row.company_id.id)
+            if key in keys:
+                known.add(key)
+                if row.date:
+                    prices[key] = row.price_ttc
+
+        missing = keys - known
+        if missing:
+            moves = self.env['maintenance.equipment']._find_last_purchase_moves(missing)
+            if moves:
+                prices.update(Price._upsert(moves))
+            Price._insert_no_purchase(missing - set(moves))
+        return prices
+
+    @api.model
+    def _update_from_moves(self, moves):
+        """Met à jour l'index à partir de mouvements d'achat entrants validés."""
+        entries = {}
+        for move in moves:
+            keys = [(move.product_id.id, False, move.company_id.id)]
+            keys += [(move.product_id.id, lot.id, move.company_id.id) for lot in move.move_line_ids.lot_id]
+            for key in keys:
+                current = entries.get(key)
+                if not current or (current.date, current.id) < (move.date, move.id):
+                    entries[key] = move
+        if entries:
+            self.sudo()._upsert(entries)
+            # Un nouvel achat peut compléter des équipements marqués impossibles
+            self.env['maintenance.equipment'].sudo().search([
+                ('product_id', 'in', list({key[0] for key in entries})),
+                ('missing_data_unresolved', '=', True),
+            ]).with_context(skip_apply=True).write({'missing_data_unresolved': False})
+
+    @api.model
+    def _upsert(self, moves_by_key):
+        """Écrit {clé: stock.move} dans l'index, sans remplacer un achat plus récent.
+        INSERT ... ON CONFLICT : deux réceptions (ou deux onchanges) simultanées sur
+        la même clé ne lèvent pas de violation d'unicité.
+        Retourne {clé: price_ttc} des mouvements fournis."""
+        # Prix calculés en lot, par société
+        move_ids_by_company = defaultdict(list)
+        for key, move in moves_by_key.items():
+            move_ids_by_company[key[2]].append(move.id)
+        prices_by_company = {
+            company_id: self.env['maintenance.equipment']._purchase_moves_unit_price_ttc(
+                self.env['stock.move'].browse(move_ids), self.env['res.company'].browse(company_id),
+            )
+            for company_id, move_ids in move_ids_by_company.items()
+        }
+        prices = {
+            key: prices_by_company[key[2]][move.id]
+            for key, move in moves_by_key.items()
+        }
+        self._insert_rows(
+            [(key, move.id, move.date, prices[key]) for key, move in moves_by_key.items()],
+            on_conflict="""
+                DO UPDATE SET move_id = EXCLUDED.move_id,
+                              date = EXCLUDED.date,
+                              price_ttc = EXCLUDED.price_ttc,
+                              write_uid = EXCLUDED.write_uid,
+                              write_date = EXCLUDED.write_date
+                        WHERE {table}.date IS NULL OR EXCLUDED.date >= {table}.date
+            """,
+        )
+        return prices
+
+    @api.model
+    def _insert_no_purchase(self, keys):
+        """Entrées négatives (aucun achat) ; une entrée existante est conservée."""
+        if keys:
+            self._insert_rows([(key, None, None, None) for key in keys], on_conflict="DO NOTHING")
+
+    @api.model
+    def _insert_rows(self, rows, on_conflict):
+        """rows : [((product_id, lot_id, company_id), move_id, date, price_ttc)]"""
+        self.flush_model()
+        now = fields.Datetime.now()
+        uid = self.env.uid
+        values = [
+            (company_id, product_id, lot_id or None, move_id, date, price_ttc, uid, now, uid, now)
+            for (product_id, lot_id, company_id), move_id, date, price_ttc in rows
+        ]
+        for sub_values in split_every(1000, values):
+            self.env.cr.execute(
+                f"""
+                INSERT INTO {self._table}
+                       (company_id, product_id, lot_id, move_id, date, price_ttc,
+                        create_uid, create_date, write_uid, write_date)
+                VALUES {", ".join(["%s"] * len(sub_values))}
+                ON CONFLICT (company_id, product_id, COALESCE(lot_id, 0))
+                """ + on_conflict.format(table=self._table),
+                list(sub_values),
+            )
+        self.invalidate_model()
@@ -1,6 +1,33 @@
-from odoo import models, fields, api
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, tools, _
 from odoo.tools.float_utils import float_is_zero
 
+_logger = logging.getLogger(__name__)
+
+# Champs dont la modification relance la complétion serial_no / model / cost
+COMPLETION_TRIGGER_FIELDS = {'product_id', 'lot_id', 'company_id', 'cost', 'serial_no', 'model'}
+
+# Complétion en masse (cron / action serveur)
+COMPLETION_BATCH_SIZE = 500
+COMPLETION_TIME_LIMIT = 240  # secondes par exécution du cron
+COMPLETION_CURSOR_PARAM = 'extend_maintenance.complete_missing_last_id'
+
+# Planification calibration / rappel : type de demande -> champ date d'échéance
+# (calibration_date est la dernière calibration : l'échéance est next_calibration_date)
+RECALL_DATE_FIELDS = {'calibration': 'next_calibration_date', 'recall': 'recall_date'}
+RECALL_LEAD_DAYS_PARAM = 'extend_maintenance.recall_lead_days'
+RECALL_LEAD_DAYS_DEFAULT = 30
+# Échéances dépassées depuis plus longtemps : ignorées (pas de rattrapage de l'historique)
+RECALL_GRACE_DAYS_PARAM = 'extend_maintenance.recall_grace_days'
+RECALL_GRACE_DAYS_DEFAULT = 7
+RECALL_BATCH_SIZE = 1000
+
 class MaintenanceEquipment(models.Model):
     _inherit = 'maintenance.equipment'
 
@@ -12,10 +39,32 @@ class MaintenanceEquipment(models.Model):
     ], string="État de l'équipement", default='in_service')
 
     calibration_date = fields.Date(string="Date de calibration")
+
+    calibration_interval = fields.Integer(
+        string="Périodicité de calibration (mois)",
+        help="Intervalle entre deux calibrations ; 0 = pas de calibration périodique.",
+    )
+    next_calibration_date = fields.Date(
+        string="Prochaine calibration",
+        compute='_compute_next_calibration_date', store=True,
+    )
     
     recall_date = fields.Date(string="Date de rappel")
 
-    equipment_image = fields.Image(string="Image de l'équipement") 
+    # Original conservé tel quel ; variantes réduites générées une fois à l'upload (pièces jointes)
+    equipment_image = fields.Image(string="Image de l'équipement")
+    equipment_image_512 = fields.Image(
+        string="Image de l'équipement (512)", related='equipment_image',
+        max_width=512, max_height=512, store=True,
+    )
+    equipment_image_128 = fields.Image(
+        string="Image de l'équipement (128)", related='equipment_image',
+        max_width=128, max_height=128, store=True,
+    )
+
+    # Complétion en masse : essayé sans succès (pas d'historique d'achat, etc.) ;
+    # remis à False quand une donnée d'entrée change ou qu'une réception arrive
+    missing_data_unresolved = fields.Boolean(string="Complétion impossible", copy=False, readonly=True)
 
     # --- Nouveaux champs ---
     # Tracking du produit pour piloter l'affichage du champ lot/numéro de série
@@ -27,10 +76,29 @@ class MaintenanceEquipment(models.Model):
     lot_id = fields.Many2one(
         'stock.lot',
         string="Numéro de série",
-        domain="[('product_id','=',product_id), ('company_id','in',[False, company_id]), ('product_qty','>',0)]",
+        domain="[('product_id','=',product_id), ('company_id','in',[False, company_id]), ('is_available','=',True)]",
         help="Sélectionne le numéro de série à lier à cet équipement."
     )
 
+    @api.depends('calibration_date', 'calibration_interval')
+    def _compute_next_calibration_date(self):
+        for rec in self:
+            if rec.calibration_date and rec.calibration_interval > 0:
+                rec.next_calibration_date = rec.calibration_date + relativedelta(months=rec.calibration_interval)
+            else:
+                rec.next_calibration_date = False
+
+    def init(self):
+        # Ancien index (calibration_date n'est pas une échéance)
+        self._cr.execute("DROP INDEX IF EXISTS maintenance_equipment_calibration_date_due_idx")
+        # Planification calibration / rappel : échéances renseignées des équipements actifs
+        for date_field in RECALL_DATE_FIELDS.values():
+            tools.create_index(
+                self._cr, f'maintenance_equipment_{date_field}_due_idx', self._table,
+                [date_field, 'id'],
+                where=f"{date_field} IS NOT NULL AND active",
+            )
+
     # ---------- Onchanges (UI) ----------
     @api.onchange('product_id')
     def _onchange_product_id_fill_from_product(self):
@@ -39,23 +107,18 @@ class MaintenanceEquipment(models.Model):
             if rec.product_id:
                 rec.lot_id = False
                 rec.model = rec.product_id.default_code or rec.product_id.display_name
-                move = self.env['stock.move'].search([
-                    ('product_id', '=', rec.product_id.id),
-                    ('state', '=', 'done'),
-                    ('picking_id.picking_type_code', '=', 'incoming'),
-                    ('company_id', '=', (rec.company_id or self.env.company).id),
-                    ('purchase_line_id', '!=', False),                          # (optionnel) vient d'un PO
-                ], order='date desc, id desc', limit=1)
+                key = (rec.product_id.id, False, (rec.company_id or self.env.company).id)
+                price = self.env['maintenance.equipment.purchase.price']._get_prices([key]).get(key)
 
                 # rec.cost = move.price_unit or 0.0
-                rec.cost = rec._compute_purchase_unit_price_ttc(move) if move else (rec.product_id.standard_price or 0.0)
+                rec.cost = price if price is not None else (rec.product_id.standard_price or 0.0)
 
 
     @api.onchange('product_id', 'company_id')
     def _onchange_product_domain_lot(self):
         """Filtre le champ lot_id : uniquement les lots du produit (et de la société)."""
         for rec in self:
-            domain = []
+            domain = [('is_available', '=', True)]
             if rec.product_id:
                 domain.append(('product_id', '=', rec.product_id.id))
             if rec.company_id:
@@ -68,69 +131,129 @@ class MaintenanceEquipment(models.Model):
         for rec in self:
             if rec.lot_id:
                 rec.serial_no = rec.lot_id.name
-                move = self.env['stock.move'].search([
-                    ('product_id', '=', rec.lot_id.product_id.id),
-                    ('state', '=', 'done'),
-                    ('picking_id.picking_type_code', '=', 'incoming'),
-                    ('move_line_ids.lot_id', '=', rec.lot_id.id),
-                    ('company_id', '=', (rec.company_id or self.env.company).id),
-                    ('purchase_line_id', '!=', False),                          # (optionnel) vient d'un PO
-                ], order='date desc, id desc', limit=1)
+                key = (rec.lot_id.product_id.id, rec.lot_id.id, (rec.company_id or self.env.company).id)
+                price = self.env['maintenance.equipment.purchase.price']._get_prices([key]).get(key)
 
                 # rec.cost = move.price_unit or 0.0
-                rec.cost = rec._compute_purchase_unit_price_ttc(move) if move else rec.cost
+                rec.cost = price if price is not None else rec.cost
 
 
     # ---------- Complétion server-side SANS boucle ----------
-    def _compute_missing_from_product_lot(self, incoming_vals=None):
+    @api.model
+    def _get_product_default_fields(self):
+        """Le coût est complété après create/write (dernier prix d'achat, sinon prix standard)."""
+        return super()._get_product_default_fields() - {'cost'}
+
+    def _compute_missing_from_product_lot(self, incoming_vals=None, incoming_vals_by_id=None):
         """
         Prépare des valeurs à compléter après create/write, sans déclencher de boucles.
         On n'écrit que ce qui manque et seulement si différent.
+        Les coûts d'achat sont résolus en une passe pour tout le recordset.
         """
         updates_per_rec = {}
-        incoming_vals = incoming_vals or {}
+        need_cost = {}
+        incoming_vals_by_id = incoming_vals_by_id or {}
         for rec in self:
+            vals = incoming_vals_by_id.get(rec.id, incoming_vals or {})
             upd = {}
             # Depuis le lot
-            if rec.lot_id and not incoming_vals.get('serial_no') and not rec.serial_no:
+            if rec.lot_id and not vals.get('serial_no') and not rec.serial_no:
                 if rec.lot_id.name and rec.serial_no != rec.lot_id.name:
                     upd['serial_no'] = rec.lot_id.name
             # Depuis le produit
             if rec.product_id:
-                if not incoming_vals.get('model') and not rec.model:
+                if not vals.get('model') and not rec.model:
                     val_model = rec.product_id.default_code or rec.product_id.display_name
                     if val_model and rec.model != val_model:
                         upd['model'] = val_model
-                # if not incoming_vals.get('cost') and (not rec.cost or rec.cost == 0.0):
-                #     val_cost = rec.product_id.standard_price or 0.0
-                #     if rec.cost != val_cost:
-                #         upd['cost'] = val_cost
-                
-                if not incoming_vals.get('cost') and (not rec.cost or float_is_zero(rec.cost, precision_digits=2)):
-                    move = self.env['stock.move'].search([
-                        ('state', '=', 'done'),
-                        ('picking_id.picking_type_code', '=', 'incoming'),
-                        ('company_id', '=', (rec.company_id or self.env.company).id),
-                        ('purchase_line_id', '!=', False),
-                        ('product_id', '=', (rec.lot_id.product_id.id if rec.lot_id else rec.product_id.id)),
-                    ] + ([('move_line_ids.lot_id', '=', rec.lot_id.id)] if rec.lot_id else []),
-                    order='date desc, id desc', limit=1)
-                    val_cost = rec._compute_purchase_unit_price_ttc(move) if move else (rec.product_id.standard_price or 0.0)
-                    if not float_is_zero((val_cost or 0.0) - (rec.cost or 0.0), precision_digits=2):
-                        upd['cost'] = val_cost
-
-            if upd:
-                updates_per_rec[rec.id] = upd
-        return updates_per_rec
+                if not vals.get('cost') and (not rec.cost or float_is_zero(rec.cost, precision_digits=2)):
+                    need_cost[rec] = rec._purchase_move_key()
+            updates_per_rec[rec.id] = upd
+
+        if need_cost:
+            prices = self.env['maintenance.equipment.purchase.price']._get_prices(set(need_cost.values()))
+            for rec, key in need_cost.items():
+                val_cost = prices.get(key)
+                if val_cost is None:
+                    val_cost = rec.product_id.standard_price or 0.0
+                if not float_is_zero((val_cost or 0.0) - (rec.cost or 0.0), precision_digits=2):
+                    updates_per_rec[rec.id]['cost'] = val_cost
+
+        return {rec_id: upd for rec_id, upd in updates_per_rec.items() if upd}
+
+    def _purchase_move_key(self):
+        """Clé (produit, lot, société) du dernier achat entrant de l'équipement."""
+        self.ensure_one()
+        product = self.lot_id.product_id if self.lot_id else self.product_id
+        return (product.id, self.lot_id.id or False, (self.company_id or self.env.company).id)
+
+    @api.model
+    def _find_last_purchase_moves(self, keys):
+        """
+        Dernier stock.move d'achat entrant ('done', issu d'un PO) par clé
+        (product_id, lot_id ou False, company_id), en une requête par type de clé.
+        Retourne {clé: stock.move}.
+        """
+        StockMove = self.env['stock.move']
+        keys = set(keys)
+        if not keys:
+            return {}
+        StockMove.flush_model(['state', 'picking_id', 'company_id', 'purchase_line_id', 'product_id', 'date'])
+        self.env['stock.picking'].flush_model(['picking_type_id'])
+        self.env['stock.move.line'].flush_model(['move_id', 'lot_id'])
+
+        result = {}
+        plain_keys = {k for k in keys if not k[1]}
+        lot_keys = keys - plain_keys
+        if plain_keys:
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (sm.product_id, sm.company_id)
+                       sm.product_id, sm.company_id, sm.id
+                  FROM stock_move sm
+                  JOIN stock_picking sp ON sp.id = sm.picking_id
+                  JOIN stock_picking_type spt ON spt.id = sp.picking_type_id
+                 WHERE sm.state = 'done'
+                   AND spt.code = 'incoming'
+                   AND sm.purchase_line_id IS NOT NULL
+                   AND sm.product_id = ANY(%s)
+                   AND sm.company_id = ANY(%s)
+              ORDER BY sm.product_id, sm.company_id, sm.date DESC, sm.id DESC
+            """, [list({k[0] for k in plain_keys}), list({k[2] for k in plain_keys})])
+            for product_id, company_id, move_id in self.env.cr.fetchall():
+                key = (product_id, False, company_id)
+                if key in plain_keys:
+                    result[key] = move_id
+        if lot_keys:
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (sml.lot_id, sm.company_id)
+                       sm.product_id, sml.lot_id, sm.company_id, sm.id
+                  FROM stock_move sm
+                  JOIN stock_move_line sml ON sml.move_id = sm.id
+                  JOIN stock_picking sp ON sp.id = sm.picking_id
+                  JOIN stock_picking_type spt ON spt.id = sp.picking_type_id
+                 WHERE sm.state = 'done'
+                   AND spt.code = 'incoming'
+                   AND sm.purchase_line_id IS NOT NULL
+                   AND sml.lot_id = ANY(%s)
+                   AND sm.company_id = ANY(%s)
+              ORDER BY sml.lot_id, sm.company_id, sm.date DESC, sm.id DESC
+            """, [list({k[1] for k in lot_keys}), list({k[2] for k in lot_keys})])
+            for product_id, lot_id, company_id, move_id in self.env.cr.fetchall():
+                key = (product_id, lot_id, company_id)
+                if key in lot_keys:
+                    result[key] = move_id
+
+        # Itérer le recordset garde un prefetch commun à tous les mouvements
+        moves_by_id = {move.id: move for move in StockMove.browse(list(set(result.values())))}
+        return {key: moves_by_id[move_id] for key, move_id in result.items()}
 
     @api.model_create_multi
     def create(self, vals_list):
         records = super().create(vals_list)
         # Compléter proprement après création (sans relancer la logique)
-        for rec, vals in zip(records, vals_list):
-            updates = rec._compute_missing_from_product_lot(incoming_vals=vals).get(rec.id)
-            if updates:
-                super(MaintenanceEquipment, rec.with_context(skip_apply=True)).write(updates)
+        records._apply_missing_updates(records._compute_missing_from_product_lot(
+            incoming_vals_by_id={rec.id: vals for rec, vals in zip(records, vals_list)}
+        ))
         return records
 
     def write(self, vals):
@@ -138,14 +261,209 @@ class MaintenanceEquipment(models.Model):
         if self.env.context.get('skip_apply'):
             return super().write(vals)
 
+        if COMPLETION_TRIGGER_FIELDS.intersection(vals):
+            vals = dict(vals, missing_data_unresolved=False)
         res = super().write(vals)
-        # Compléter après write normal
-        for rec in self:
-            updates = rec._compute_missing_from_product_lot(incoming_vals=vals).get(rec.id)
-            if updates:
-                super(MaintenanceEquipment, rec.with_context(skip_apply=True)).write(updates)
+        # Compléter après write normal, seulement si une donnée d'entrée a changé
+        # (un changement d'état en masse reste un simple UPDATE)
+        if COMPLETION_TRIGGER_FIELDS.intersection(vals):
+            self._apply_missing_updates(self._compute_missing_from_product_lot(incoming_vals=vals))
         return res
 
+    def _apply_missing_updates(self, updates_per_rec):
+        """Un seul write silencieux par jeu de valeurs identique."""
+        groups = defaultdict(list)
+        for rec_id, upd in updates_per_rec.items():
+            groups[tuple(sorted(upd.items()))].append(rec_id)
+        for items, rec_ids in groups.items():
+            records = self.browse(rec_ids).with_context(skip_apply=True)
+            super(MaintenanceEquipment, records).write(dict(items))
+
+    # ---------- Complétion en masse (parc existant) ----------
+    @api.model
+    def _missing_data_domain(self):
+        """Équipements dont serial_no, model ou cost restent à compléter."""
+        return [
+            '|', '|',
+            '&', ('lot_id', '!=', False), ('serial_no', '=', False),
+            '&', ('product_id', '!=', False), ('model', '=', False),
+            '&', ('product_id', '!=', False), ('cost', '=', 0),
+        ]
+
+    def _complete_missing_data(self):
+        """Complète serial_no / model / cost des équipements sélectionnés, par lots.
+        Ceux qui restent incomplets sont marqués pour ne plus être reparcourus par le cron."""
+        domain = self._missing_data_domain()
+        for offset in range(0, len(self), COMPLETION_BATCH_SIZE):
+            batch = self[offset:offset + COMPLETION_BATCH_SIZE]
+            batch._apply_missing_updates(batch._compute_missing_from_product_lot())
+            unresolved = batch.filtered_domain(domain)
+            if unresolved:
+                unresolved.with_context(skip_apply=True).write({'missing_data_unresolved': True})
+        return True
+
+    @api.model
+    def _get_complete_missing_progress(self):
+        """Avancement de la complétion en masse (retour du cron, action serveur)."""
+        domain = self._missing_data_domain()
+        last_id = int(self.env['ir.config_parameter'].sudo().get_param(COMPLETION_CURSOR_PARAM, 0) or 0)
+        todo = domain + [('missing_data_unresolved', '=', False)]
+        return {
+            'last_id': last_id,
+            'remaining': self.search_count(todo + [('id', '>', last_id)]),
+            'pending': self.search_count(todo),
+            'unresolved': self.search_count(domain + [('missing_data_unresolved', '=', True)]),
+        }
+
+    @api.model
+    def action_show_complete_missing_progress(self):
+        progress = self._get_complete_missing_progress()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Complétion des équipements"),
+                'message': _(
+                    "%(pending)s équipement(s) à compléter, dont %(remaining)s après le curseur "
+                    "(dernier id traité : %(last_id)s) ; %(unresolved)s impossible(s) à compléter.",
+                    **progress,
+                ),
+                'sticky': False,
+            },
+        }
+
+    @api.model
+    def _cron_complete_missing_data(self, batch_size=COMPLETION_BATCH_SIZE, time_limit=COMPLETION_TIME_LIMIT, auto_commit=True):
+        """
+        Parcourt le parc à compléter par lots d'ids croissants, un commit par lot.
+        Le dernier id traité est mémorisé (ir.config_parameter) : si le temps est
+        écoulé, le cron est relancé et reprend là où il s'est arrêté.
+        Les équipements déjà essayés sans succès (missing_data_unresolved) sont ignorés.
+        Retourne l'avancement (voir _get_complete_missing_progress) et le nombre traité.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        last_id = int(ICP.get_param(COMPLETION_CURSOR_PARAM, 0) or 0)
+        domain = self._missing_data_domain() + [('missing_data_unresolved', '=', False)]
+        remaining = self.search_count(domain + [('id', '>', last_id)])
+        done = 0
+        started = time.monotonic()
+        while True:
+            batch = self.search(domain + [('id', '>', last_id)], order='id', limit=batch_size)
+            if not batch:
+                # Passage complet terminé : le prochain repart du début
+                ICP.set_param(COMPLETION_CURSOR_PARAM, 0)
+                break
+            batch._complete_missing_data()
+            last_id = batch[-1].id
+            done += len(batch)
+            ICP.set_param(COMPLETION_CURSOR_PARAM, last_id)
+            _logger.info(
+                "Maintenance equipment completion: %s/%s processed (last id %s)",
+                done, remaining, last_id,
+            )
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+            if time.monotonic() - started > time_limit:
+                self.env.ref('extend_maintenance.ir_cron_equipment_complete_missing_data')._trigger()
+                break
+        return dict(self._get_complete_missing_progress(), done=done)
+
+    # ---------- Planification calibration / rappel ----------
+    @api.model
+    def _get_due_for_recall(self, kind, from_date, limit_date, batch_size=RECALL_BATCH_SIZE):
+        """
+        (id, échéance) des équipements dont l'échéance `kind` tombe entre
+        `from_date` et `limit_date` et qui n'ont pas encore de demande pour cette échéance.
+        Index partiel sur la date côté équipement, index unique côté demande.
+        """
+        date_field = RECALL_DATE_FIELDS[kind]
+        self.env['maintenance.request'].flush_model(['equipment_id', 'recall_kind', 'recall_due_date'])
+        self.flush_model([date_field, 'active'])
+        self.env.cr.execute(f"""
+            SELECT e.id, e.{date_field}
+              FROM maintenance_equipment e
+             WHERE e.{date_field} IS NOT NULL
+               AND e.active
+               AND e.{date_field} BETWEEN %(from_date)s AND %(limit_date)s
+               AND NOT EXISTS (
+                    SELECT 1 FROM maintenance_request r
+                     WHERE r.equipment_id = e.id
+                       AND r.recall_kind = %(kind)s
+                       AND r.recall_due_date = e.{date_field})
+          ORDER BY e.{date_field}, e.id
+             LIMIT %(limit)s
+        """, {'from_date': from_date, 'limit_date': limit_date, 'kind': kind, 'limit': batch_size})
+        return self.env.cr.fetchall()
+
+    def _prepare_recall_request_vals(self, kind, due_date):
+        self.ensure_one()
+        label = _("Calibration") if kind == 'calibration' else _("Rappel")
+        vals = {
+            'name': f"{label} - {self.name}",
+            'equipment_id': self.id,
+            'maintenance_type': 'preventive',
+            'request_date': fields.Date.context_today(self),
+            'schedule_date': fields.Datetime.to_datetime(due_date),
+            'user_id': self.technician_user_id.id,
+            'company_id': self.company_id.id,
+            'recall_kind': kind,
+            'recall_due_date': due_date,
+        }
+        if self.maintenance_team_id:
+            vals['maintenance_team_id'] = self.maintenance_team_id.id
+        return vals
+
+    def _create_recall_requests(self, kind, due_dates):
+        """Une création groupée par équipe de maintenance."""
+        vals_by_team = defaultdict(list)
+        for equipment in self:
+            vals_by_team[equipment.maintenance_team_id.id].append(
+                equipment._prepare_recall_request_vals(kind, due_dates[equipment.id])
+            )
+        request_ids = []
+        for vals_list in vals_by_team.values():
+            request_ids += self.env['maintenance.request'].create(vals_list).ids
+        return self.env['maintenance.request'].browse(request_ids)
+
+    @api.model
+    def _cron_schedule_recalls(self, batch_size=RECALL_BATCH_SIZE, time_limit=COMPLETION_TIME_LIMIT, auto_commit=True):
+        """
+        Crée les demandes préventives de calibration / rappel des équipements
+        dont l'échéance (prochaine calibration, date de rappel) arrive dans
+        `extend_maintenance.recall_lead_days` jours, ou est dépassée depuis au plus
+        `extend_maintenance.recall_grace_days` jours (les échéances plus anciennes
+        ne sont pas rattrapées).
+        Idempotent : une seule demande par équipement, type et échéance ;
+        une nouvelle demande n'est créée que si la date d'échéance change.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        lead_days = int(ICP.get_param(RECALL_LEAD_DAYS_PARAM, RECALL_LEAD_DAYS_DEFAULT))
+        grace_days = int(ICP.get_param(RECALL_GRACE_DAYS_PARAM, RECALL_GRACE_DAYS_DEFAULT))
+        today = fields.Date.context_today(self)
+        from_date = today - timedelta(days=grace_days)
+        limit_date = today + timedelta(days=lead_days)
+        started = time.monotonic()
+        created = 0
+        for kind in RECALL_DATE_FIELDS:
+            while True:
+                rows = self._get_due_for_recall(kind, from_date, limit_date, batch_size=batch_size)
+                if not rows:
+                    break
+                due_dates = dict(rows)
+                equipments = self.browse(list(due_dates))
+                created += len(equipments._create_recall_requests(kind, due_dates))
+                _logger.info(
+                    "Maintenance recall scheduling (%s): %s requests created", kind, created,
+                )
+                if auto_commit:
+                    self.env.cr.commit()
+                self.env.invalidate_all()
+                if time.monotonic() - started > time_limit:
+                    self.env.ref('extend_maintenance.ir_cron_equipment_schedule_recalls')._trigger()
+                    return created
+        return created
+
     # ---------- Smart button : ouvrir le lot ----------
     def action_open_lot(self):
         """Ouvre le lot/numéro de série lié en vue formulaire."""
@@ -166,11 +484,36 @@ class MaintenanceEquipment(models.Model):
     def _compute_purchase_unit_price_ttc(self, move):
         """Prix unitaire TTC (1 pièce) en devise société à partir d'un stock.move d'achat."""
         self.ensure_one()
-        pol = move.purchase_line_id
-        if not pol:
-            return 0.0
+        return self._purchase_move_unit_price_ttc(move, self.company_id or self.env.company)
+
+    @api.model
+    def _purchase_move_unit_price_ttc(self, move, company):
+        """Prix unitaire TTC d'un stock.move d'achat, converti dans la devise de `company`."""
+        return self._purchase_moves_unit_price_ttc(move, company).get(move.id, 0.0)
+
+    @api.model
+    def _purchase_moves_unit_price_ttc(self, moves, company):
+        """
+        Variante groupée : {move.id: prix TTC en devise de `company`}.
+        Mémo par transaction clé (ligne d'achat, société, date) : les taxes et le
+        taux ne sont calculés qu'une fois pour tous les équipements d'une même ligne.
+        """
+        memo = self.env.cr.precommit.data.setdefault('extend_maintenance.purchase_price_ttc', {})
+        prices = {}
+        for move in moves:
+            pol = move.purchase_line_id
+            if not pol:
+                prices[move.id] = 0.0
+                continue
+            date = pol.order_id.date_order or fields.Date.today()
+            key = (pol.id, company.id, date)
+            if key not in memo:
+                memo[key] = self._purchase_line_unit_price_ttc(pol, company, date)
+            prices[move.id] = memo[key]
+        return prices
 
-        company = (self.company_id or self.env.company)
+    @api.model
+    def _purchase_line_unit_price_ttc(self, pol, company, date):
         order = pol.order_id
         currency = order.currency_id or company.currency_id
         partner = order.partner_id
@@ -192,6 +535,6 @@ class MaintenanceEquipment(models.Model):
             unit_ttc_in_order_currency,
             company.currency_id,
             company,
-            order.date_order or fields.Date.today()
+            date
         )
         return price_company
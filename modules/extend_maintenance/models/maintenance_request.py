@@ -1,6 +1,12 @@
-from odoo import api, fields, models, _
+from collections import defaultdict
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError
 
+EXT_SERVICE_PRODUCT_XMLID = 'extend_maintenance.product_external_maintenance'
+STAGE_AT_VENDOR_XMLID = 'extend_maintenance.stage_at_vendor'
+STAGE_BACK_FROM_VENDOR_XMLID = 'extend_maintenance.stage_back_from_vendor'
+
 class MaintenanceRequest(models.Model):
     _inherit = 'maintenance.request'
 
@@ -24,48 +30,86 @@ class MaintenanceRequest(models.Model):
 
     partner_id = fields.Many2one('res.partner', string="Fournisseur (sous-traitant)", domain=[('supplier_rank', '>', 0)])
     vendor_rma = fields.Char(string="N° RMA fournisseur")
-    tracking_ref = fields.Char(string="Référence d’expédition")
+    tracking_ref = fields.Char(string="Référence d’expédition", index='btree_not_null')
     purchase_id = fields.Many2one('purchase.order', string="Bon de commande fournisseur", readonly=True, copy=False)
     external_cost = fields.Monetary(string="Coût externe", currency_field='company_currency_id', readonly=True)
     company_currency_id = fields.Many2one(related='company_id.currency_id', string="Devise", store=True, readonly=True)
     date_sent_vendor = fields.Datetime(string="Envoyé chez fournisseur")
     date_back_vendor = fields.Datetime(string="Reçu du fournisseur")
 
+    # Demandes générées par la planification calibration / rappel (idempotence)
+    recall_kind = fields.Selection(
+        [('calibration', 'Calibration'), ('recall', 'Rappel')],
+        string="Échéance planifiée", readonly=True, copy=False,
+    )
+    recall_due_date = fields.Date(string="Date d'échéance", readonly=True, copy=False)
+
+    _sql_constraints = [
+        ('recall_unique', 'unique(equipment_id, recall_kind, recall_due_date)',
+         "Une demande existe déjà pour cette échéance de l'équipement."),
+    ]
+
+    def init(self):
+        # Analyse maintenance externe (maintenance.external.report) : tickets externes envoyés
+        tools.create_index(
+            self._cr, 'maintenance_request_external_sent_idx', self._table,
+            ['date_sent_vendor', 'partner_id'],
+            where="maintenance_flow = 'external' AND date_sent_vendor IS NOT NULL",
+        )
+
     @api.depends('maintenance_flow')
     def _compute_is_external(self):
         for r in self:
             r.is_external = (r.maintenance_flow == 'external')
 
     # ---------- Helpers ----------
+    @api.model
+    def _bind_external_maintenance_xmlids(self):
+        """
+        Rattache aux xmlids du module le produit EXT_MAINT et les étapes
+        fournisseur créés avant leur introduction, pour ne pas les dupliquer
+        (appelé par data/maintenance_data.xml avant la création des records).
+        """
+        IMD = self.env['ir.model.data']
+        candidates = [
+            (EXT_SERVICE_PRODUCT_XMLID, lambda: self.env['product.product'].search(
+                [('default_code', '=', 'EXT_MAINT'), ('type', '=', 'service')], limit=1)),
+            (STAGE_AT_VENDOR_XMLID, lambda: self.env['maintenance.stage'].search(
+                [('name', 'ilike', 'Chez fournisseur')], limit=1)),
+            (STAGE_BACK_FROM_VENDOR_XMLID, lambda: self.env['maintenance.stage'].search(
+                [('name', 'ilike', 'Reçu du fournisseur')], limit=1)),
+        ]
+        for xmlid, finder in candidates:
+            if self.env.ref(xmlid, raise_if_not_found=False):
+                continue
+            record = finder()
+            if record:
+                IMD._update_xmlids([{'xml_id': xmlid, 'record': record, 'noupdate': True}])
+
     def _get_or_create_external_service_product(self):
-        """Produit service générique pour la ligne de commande fournisseur."""
-        Product = self.env['product.product']
-        product = Product.search([('default_code', '=', 'EXT_MAINT'), ('type', '=', 'service')], limit=1)
+        """Produit service générique pour la ligne de commande fournisseur.
+        Résolu par xmlid (cache registre de ir.model.data, invalidé à la suppression)."""
+        product = self.env.ref(EXT_SERVICE_PRODUCT_XMLID, raise_if_not_found=False)
         if not product:
-            product = Product.create({
+            product = self.env['product.product'].create({
                 'name': 'Maintenance externe',
                 'default_code': 'EXT_MAINT',
                 'type': 'service',
                 'purchase_ok': True,
                 'sale_ok': False,
             })
+            self.env['ir.model.data']._update_xmlids([
+                {'xml_id': EXT_SERVICE_PRODUCT_XMLID, 'record': product, 'noupdate': True},
+            ])
         return product
 
     # ---------- Actions ----------
-    def action_create_vendor_rfq(self):
-        """Créer un devis fournisseur et le lier au ticket."""
+    def _get_vendor_rfq_line_description(self):
+        """Description riche pour le fournisseur."""
         self.ensure_one()
-        if not self.is_external:
-            raise UserError(_("Le ticket n'est pas marqué comme maintenance externe."))
-        if not self.partner_id:
-            raise UserError(_("Veuillez choisir un fournisseur."))
-
-        product = self._get_or_create_external_service_product()
-
-        # Description riche pour le fournisseur
         equip = self.equipment_id
         sn = equip.serial_no or getattr(equip, 'lot_id', False) and equip.lot_id.name or ''
-        desc = _(
+        return _(
             "Maintenance externe pour l'équipement: %(eq)s\n"
             "- Numéro de série: %(sn)s\n"
             "- Catégorie: %(cat)s\n"
@@ -80,64 +124,137 @@ class MaintenanceRequest(models.Model):
             'tid': self.id,
         }
 
-        PO = self.env['purchase.order'].create({
-            'partner_id': self.partner_id.id,
-            'company_id': self.company_id.id,
-            'origin': f"MR{self.id} - {self.name}",
+    def action_create_vendor_rfq(self):
+        """Créer les devis fournisseur et les lier aux tickets :
+        un PO par (fournisseur, société), une ligne par ticket."""
+        for request in self:
+            if not request.is_external:
+                raise UserError(_("Le ticket %s n'est pas marqué comme maintenance externe.", request.display_name))
+            if not request.partner_id:
+                raise UserError(_("Veuillez choisir un fournisseur (ticket %s).", request.display_name))
+            if request.purchase_id:
+                raise UserError(_("Le ticket %s a déjà un devis fournisseur.", request.display_name))
+
+        # Résolus une seule fois pour tout le lot
+        product = self._get_or_create_external_service_product()
+        stage = self.env.ref(STAGE_AT_VENDOR_XMLID, raise_if_not_found=False)
+        now = fields.Datetime.now()
+
+        groups = defaultdict(lambda: self.browse())
+        for request in self:
+            groups[(request.partner_id, request.company_id)] |= request
+        group_list = list(groups.items())
+
+        orders = self.env['purchase.order'].create([{
+            'partner_id': partner.id,
+            'company_id': company.id,
+            'origin': ", ".join(f"MR{r.id} - {r.name}" for r in requests),
             'order_line': [(0, 0, {
                 'product_id': product.id,
-                'name': desc,
+                'name': r._get_vendor_rfq_line_description(),
                 'product_qty': 1.0,
                 'price_unit': 0.0,
                 'product_uom': product.uom_id.id,
-                'date_planned': fields.Datetime.now(),
-            })],
-        })
-        self.write({
-            'purchase_id': PO.id,
-            'date_sent_vendor': fields.Datetime.now(),
-        })
-
-        # Option : activité pour penser à confirmer/valider le PO
-        self.activity_schedule(
-            'mail.mail_activity_data_todo',
-            summary=_("Traiter le devis fournisseur"),
-            note=_("Vérifier le devis créé et le confirmer si OK."),
-            user_id=self.env.user.id,
-            date_deadline=fields.Date.today(),
-        )
+                'date_planned': now,
+                'maintenance_request_id': r.id,
+            }) for r in requests],
+        } for (partner, company), requests in group_list])
 
-        # Passer l'étape du ticket si tu utilises des étapes personnalisées
-        if hasattr(self, 'stage_id'):
-            stage = self.env['maintenance.stage'].search([('name', 'ilike', 'Chez fournisseur')], limit=1)
+        for ((partner, company), requests), order in zip(group_list, orders):
+            vals = {'purchase_id': order.id, 'date_sent_vendor': now}
+            # Passer l'étape du ticket si tu utilises des étapes personnalisées
             if stage:
-                self.stage_id = stage.id
+                vals['stage_id'] = stage.id
+            requests.write(vals)
 
+            # Option : activité pour penser à confirmer/valider le PO (une par PO)
+            order.activity_schedule(
+                'mail.mail_activity_data_todo',
+                summary=_("Traiter le devis fournisseur"),
+                note=_("Vérifier le devis créé et le confirmer si OK."),
+                user_id=self.env.user.id,
+                date_deadline=fields.Date.today(),
+            )
+
+        if len(orders) == 1:
+            return {
+                'type': 'ir.actions.act_window',
+                'res_model': 'purchase.order',
+                'view_mode': 'form',
+                'res_id': orders.id,
+                'target': 'current',
+            }
         return {
             'type': 'ir.actions.act_window',
+            'name': _("Devis fournisseur"),
             'res_model': 'purchase.order',
-            'view_mode': 'form',
-            'res_id': PO.id,
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', orders.ids)],
             'target': 'current',
         }
 
     def action_mark_back_from_vendor(self):
-        """Marquer l'équipement comme revenu du fournisseur et remonter le coût depuis le PO."""
-        self.ensure_one()
-        updates = {'date_back_vendor': fields.Datetime.now()}
-        if self.purchase_id:
-            # On prend le total TTC du PO comme coût externe (adapte si tu veux le HT)
-            updates['external_cost'] = self.purchase_id.amount_total
-        self.write(updates)
-
+        """Marquer les équipements comme revenus du fournisseur et remonter le coût depuis les PO.
+        Le total TTC de chaque PO est réparti au prorata des lignes de chaque ticket."""
+        costs = self._get_external_costs_from_purchase()
+        # Une écriture commune (date + étape), puis une par montant distinct
+        vals = {'date_back_vendor': fields.Datetime.now()}
         # Étape retour (si tu as la colonne stage)
-        if hasattr(self, 'stage_id'):
-            stage = self.env['maintenance.stage'].search([('name', 'ilike', 'Reçu du fournisseur')], limit=1)
-            if stage:
-                self.stage_id = stage.id
-
+        stage = self.env.ref(STAGE_BACK_FROM_VENDOR_XMLID, raise_if_not_found=False)
+        if stage:
+            vals['stage_id'] = stage.id
+        self.write(vals)
+        by_cost = defaultdict(list)
+        for request_id, cost in costs.items():
+            by_cost[cost].append(request_id)
+        for cost, request_ids in by_cost.items():
+            self.browse(request_ids).write({'external_cost': cost})
         return True
-    
+
+    def _get_external_costs_from_purchase(self):
+        """{ticket.id: coût} : total TTC du PO réparti au prorata du sous-total HT
+        des lignes de chaque ticket (parts égales si rien n'est chiffré)."""
+        costs = {}
+        requests_with_po = self.filtered('purchase_id')
+        # Tous les tickets des PO, pas seulement ceux sélectionnés, pour le prorata
+        all_requests_by_po = defaultdict(list)
+        for request in self.search([('purchase_id', 'in', requests_with_po.purchase_id.ids)]):
+            all_requests_by_po[request.purchase_id.id].append(request.id)
+        weights_by_po = {}
+        for request in requests_with_po:
+            order = request.purchase_id
+            if order.id not in weights_by_po:
+                weights = defaultdict(float)
+                for line in order.order_line:
+                    if line.maintenance_request_id:
+                        weights[line.maintenance_request_id.id] += line.price_subtotal
+                weights_by_po[order.id] = weights
+            weights = weights_by_po[order.id]
+            total_weight = sum(weights.values())
+            if total_weight:
+                share = weights[request.id] / total_weight
+            else:
+                share = 1.0 / max(len(all_requests_by_po[order.id]), 1)
+            currency = order.company_id.currency_id
+            amount = order.currency_id._convert(
+                order.amount_total * share, currency, order.company_id,
+                order.date_order or fields.Date.today(),
+            )
+            costs[request.id] = currency.round(amount)
+        return costs
+
+    @api.model
+    def _mark_back_from_vendor_by_purchase(self, purchase_orders):
+        """Traite tous les tickets externes liés aux PO reçus."""
+        requests = self.search([('purchase_id', 'in', purchase_orders.ids), ('is_external', '=', True)])
+        return requests.action_mark_back_from_vendor() if requests else False
+
+    @api.model
+    def _mark_back_from_vendor_by_tracking_refs(self, tracking_refs):
+        """Traite tous les tickets externes correspondant aux références d'expédition."""
+        requests = self.search([('tracking_ref', 'in', list(tracking_refs)), ('is_external', '=', True)])
+        return requests.action_mark_back_from_vendor() if requests else False
+
     def action_open_purchase(self):
         self.ensure_one()
         if not self.purchase_id:
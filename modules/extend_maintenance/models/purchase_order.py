@@ -0,0 +1,45 @@
+from odoo import _, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import float_compare
+
+
+class PurchaseOrder(models.Model):
+    _inherit = 'purchase.order'
+
+    def _filter_maintenance_received(self):
+        """
+        PO confirmés et reçus : réception complète (receipt_status) ou, pour un PO
+        de service sans réception de stock (maintenance externe), quantité reçue
+        des lignes des tickets au moins égale à la quantité commandée.
+        """
+        def is_received(order):
+            if order.state not in ('purchase', 'done'):
+                return False
+            if order.receipt_status:
+                return order.receipt_status == 'full'
+            lines = order.order_line.filtered('maintenance_request_id') \
+                or order.order_line.filtered(lambda l: not l.display_type)
+            return all(
+                float_compare(line.qty_received, line.product_qty, precision_rounding=line.product_uom.rounding) >= 0
+                for line in lines
+            )
+        return self.filtered(is_received)
+
+    def action_maintenance_back_from_vendor(self):
+        """Marque comme revenus du fournisseur tous les tickets liés aux PO reçus."""
+        received = self._filter_maintenance_received()
+        if not received:
+            raise UserError(_("Aucun des bons de commande sélectionnés n'est entièrement reçu."))
+        return self.env['maintenance.request']._mark_back_from_vendor_by_purchase(received)
+
+
+class PurchaseOrderLine(models.Model):
+    _inherit = 'purchase.order.line'
+
+    maintenance_request_id = fields.Many2one(
+        'maintenance.request',
+        string="Ticket de maintenance",
+        index='btree_not_null',
+        copy=False,
+        readonly=True,
+    )
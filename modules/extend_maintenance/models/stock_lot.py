@@ -0,0 +1,27 @@
+from odoo import api, fields, models, tools
+
+
+class StockLot(models.Model):
+    _inherit = 'stock.lot'
+
+    # Équivalent stocké de product_qty > 0, pour le sélecteur de lot des équipements
+    is_available = fields.Boolean(
+        string="Disponible en stock",
+        compute='_compute_is_available',
+        store=True,
+        help="Le lot a une quantité positive dans un emplacement interne ou de transit.",
+    )
+
+    def init(self):
+        tools.create_index(
+            self._cr, 'stock_lot_available_product_idx', self._table,
+            ['product_id', 'company_id'], where='is_available',
+        )
+
+    @api.depends('quant_ids.quantity', 'quant_ids.location_id.usage')
+    def _compute_is_available(self):
+        for lot in self:
+            lot.is_available = any(
+                quant.quantity > 0 and quant.location_id.usage in ('internal', 'transit')
+                for quant in lot.quant_ids
+            )
@@ -0,0 +1,15 @@
+from odoo import models
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    def _action_done(self, cancel_backorder=False):
+        moves = super()._action_done(cancel_backorder=cancel_backorder)
+        # Index des derniers prix d'achat (coût des équipements)
+        purchase_moves = moves.filtered(
+            lambda m: m.state == 'done' and m.purchase_line_id and m.picking_code == 'incoming'
+        )
+        if purchase_moves:
+            self.env['maintenance.equipment.purchase.price'].sudo()._update_from_moves(purchase_moves)
+        return moves
@@ -0,0 +1,48 @@
+from odoo import fields, models, tools
+
+
+class MaintenanceExternalReport(models.Model):
+    """Analyse de la sous-traitance : délai, coût et volume par fournisseur,
+    catégorie d'équipement et mois (vue SQL, une ligne par ticket externe)."""
+    _name = 'maintenance.external.report'
+    _description = "Analyse maintenance externe"
+    _auto = False
+    _rec_name = 'request_id'
+    _order = 'date_sent_vendor desc'
+
+    request_id = fields.Many2one('maintenance.request', string="Ticket", readonly=True)
+    partner_id = fields.Many2one('res.partner', string="Fournisseur", readonly=True)
+    equipment_id = fields.Many2one('maintenance.equipment', string="Équipement", readonly=True)
+    category_id = fields.Many2one('maintenance.equipment.category', string="Catégorie", readonly=True)
+    company_id = fields.Many2one('res.company', string="Société", readonly=True)
+    company_currency_id = fields.Many2one('res.currency', string="Devise", readonly=True)
+    date_sent_vendor = fields.Datetime(string="Envoyé chez fournisseur", readonly=True)
+    date_back_vendor = fields.Datetime(string="Reçu du fournisseur", readonly=True)
+    is_back = fields.Boolean(string="Revenu", readonly=True)
+    turnaround_days = fields.Float(string="Délai (jours)", digits=(16, 1), group_operator='avg', readonly=True)
+    external_cost = fields.Monetary(string="Coût externe", currency_field='company_currency_id', readonly=True)
+    request_count = fields.Integer(string="Nombre de tickets", readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT mr.id AS id,
+                       mr.id AS request_id,
+                       mr.partner_id,
+                       mr.equipment_id,
+                       eq.category_id,
+                       mr.company_id,
+                       mr.company_currency_id,
+                       mr.date_sent_vendor,
+                       mr.date_back_vendor,
+                       mr.date_back_vendor IS NOT NULL AS is_back,
+                       EXTRACT(EPOCH FROM (mr.date_back_vendor - mr.date_sent_vendor)) / 86400.0 AS turnaround_days,
+                       mr.external_cost,
+                       1 AS request_count
+                  FROM maintenance_request mr
+             LEFT JOIN maintenance_equipment eq ON eq.id = mr.equipment_id
+                 WHERE mr.maintenance_flow = 'external'
+                   AND mr.date_sent_vendor IS NOT NULL
+            )
+        """ % self._table)
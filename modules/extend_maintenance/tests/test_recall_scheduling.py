@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import common
+
+
+class TestRecallScheduling(common.TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.today = fields.Date.context_today(cls.env['maintenance.equipment'])
+        cls.Request = cls.env['maintenance.request']
+
+    def _schedule(self):
+        return self.env['maintenance.equipment']._cron_schedule_recalls(auto_commit=False)
+
+    def _requests(self, equipment):
+        return self.Request.search([('equipment_id', '=', equipment.id), ('recall_kind', '!=', False)])
+
+    def test_past_calibration_without_due_date(self):
+        equipment = self.env['maintenance.equipment'].create({
+            'name': 'Calibrated last year',
+            'calibration_date': self.today - timedelta(days=400),
+        })
+        self._schedule()
+        self.assertFalse(self._requests(equipment))
+
+    def test_next_calibration_due(self):
+        equipment = self.env['maintenance.equipment'].create({
+            'name': 'Calibrated yearly',
+            'calibration_date': self.today - timedelta(days=360),
+            'calibration_interval': 12,
+        })
+        self._schedule()
+        request = self._requests(equipment)
+        self.assertEqual(request.recall_kind, 'calibration')
+        self.assertEqual(request.recall_due_date, equipment.next_calibration_date)
+        # Relance : pas de doublon
+        self._schedule()
+        self.assertEqual(self._requests(equipment), request)
+
+    def test_overdue_beyond_grace_period(self):
+        equipment = self.env['maintenance.equipment'].create({
+            'name': 'Long overdue recall',
+            'recall_date': self.today - timedelta(days=90),
+        })
+        self._schedule()
+        self.assertFalse(self._requests(equipment))
@@ -0,0 +1,2 @@
+from . import equipment_generate_wizard
+from . import back_from_vendor_wizard
@@ -0,0 +1,26 @@
+import re
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+
+class MaintenanceBackFromVendorWizard(models.TransientModel):
+    _name = 'maintenance.back.from.vendor.wizard'
+    _description = "Retour fournisseur par références d'expédition"
+
+    tracking_refs = fields.Text(
+        string="Références d'expédition", required=True,
+        help="Une référence par ligne (ou séparées par des virgules / points-virgules), "
+             "par exemple collées depuis le bordereau du transporteur.",
+    )
+
+    def _parse_tracking_refs(self):
+        self.ensure_one()
+        return {ref for ref in re.split(r'[\s,;]+', self.tracking_refs or '') if ref}
+
+    def action_confirm(self):
+        """Marque en une fois comme revenus du fournisseur les tickets externes correspondants."""
+        refs = self._parse_tracking_refs()
+        if not refs or not self.env['maintenance.request']._mark_back_from_vendor_by_tracking_refs(refs):
+            raise UserError(_("Aucun ticket de maintenance externe ne correspond à ces références."))
+        return {'type': 'ir.actions.act_window_close'}
@@ -0,0 +1,100 @@
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+class MaintenanceEquipmentGenerateWizard(models.TransientModel):
+    _name = 'maintenance.equipment.generate.wizard'
+    _description = "Assistant de création d'équipements depuis des numéros de série"
+
+    company_id = fields.Many2one('res.company', string="Société", required=True,
+                                 default=lambda self: self.env.company)
+    product_id = fields.Many2one(
+        'product.product', string="Produit",
+        domain="[('maintenance_ok', '=', True), ('tracking', '=', 'serial')]",
+    )
+    picking_id = fields.Many2one(
+        'stock.picking', string="Réception",
+        domain="[('picking_type_code', '=', 'incoming'), ('state', '=', 'done')]",
+    )
+    lot_ids = fields.Many2many(
+        'stock.lot', string="Numéros de série",
+        domain="[('product_id', '=?', product_id), ('product_id.maintenance_ok', '=', True)]",
+    )
+    category_id = fields.Many2one('maintenance.equipment.category', string="Catégorie d'équipement")
+    skip_existing = fields.Boolean(string="Ignorer les séries déjà équipées", default=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        active_model = self.env.context.get('active_model')
+        active_ids = self.env.context.get('active_ids') or []
+        if active_model == 'stock.picking' and active_ids:
+            res['picking_id'] = active_ids[0]
+        elif active_model == 'stock.lot' and active_ids:
+            lots = self.env['stock.lot'].browse(active_ids)
+            res['lot_ids'] = [(6, 0, lots.ids)]
+            if len(lots.product_id) == 1:
+                res['product_id'] = lots.product_id.id
+        return res
+
+    @api.onchange('picking_id', 'product_id')
+    def _onchange_picking_id(self):
+        """Reprend les numéros de série reçus sur la réception."""
+        if self.picking_id:
+            self.lot_ids = self._get_picking_lots()
+
+    def _get_picking_lots(self):
+        lots = self.picking_id.move_line_ids.lot_id.filtered(lambda lot: lot.product_id.maintenance_ok)
+        if self.product_id:
+            lots = lots.filtered(lambda lot: lot.product_id == self.product_id)
+        return lots
+
+    def _prepare_equipment_vals_list(self, lots):
+        """
+        Nom, fournisseur et réf. fournisseur via maintenance.equipment._get_product_defaults
+        (une lecture pour tous les produits, même choix du fournisseur que le formulaire) ;
+        coût depuis l'index des derniers prix d'achat (une requête pour tous les lots).
+        """
+        company = self.company_id
+        Equipment = self.env['maintenance.equipment']
+        defaults = Equipment._get_product_defaults(lots.product_id.ids, company)
+        keys = {lot.id: (lot.product_id.id, lot.id, company.id) for lot in lots}
+        prices = self.env['maintenance.equipment.purchase.price']._get_prices(set(keys.values()))
+        vals_list = []
+        for lot in lots:
+            product = lot.product_id
+            vals = dict(defaults[product.id])
+            price = prices.get(keys[lot.id])
+            if price is not None:
+                vals['cost'] = price
+            vals.update({
+                'model': product.default_code or product.display_name,
+                'product_id': product.id,
+                'lot_id': lot.id,
+                'serial_no': lot.name,
+                'company_id': company.id,
+                'category_id': self.category_id.id,
+            })
+            vals_list.append(vals)
+        return vals_list
+
+    def action_generate(self):
+        """Crée tous les équipements en un seul create(vals_list)."""
+        self.ensure_one()
+        lots = self.lot_ids or self._get_picking_lots()
+        if self.product_id:
+            lots = lots.filtered(lambda lot: lot.product_id == self.product_id)
+        if self.skip_existing and lots:
+            Equipment = self.env['maintenance.equipment'].with_context(active_test=False)
+            linked = Equipment._read_group([('lot_id', 'in', lots.ids)], groupby=['lot_id'])
+            lots -= self.env['stock.lot'].union(*(lot for lot, in linked))
+        if not lots:
+            raise UserError(_("Aucun numéro de série à transformer en équipement."))
+        equipments = self.env['maintenance.equipment'].create(self._prepare_equipment_vals_list(lots))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Équipements créés"),
+            'res_model': 'maintenance.equipment',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', equipments.ids)],
+        }
@@ -7,7 +7,13 @@
     'category': 'Tools',
     'license': 'LGPL-3',
     'depends': ['base', 'mail'],
-    'data': [],
+    'data': [
+        'security/ir.model.access.csv',
+        'views/ir_mail_server_views.xml',
+        'views/mail_mail_archive_views.xml',
+        'views/mail_queue_metric_views.xml',
+        'data/ir_cron.xml',
+    ],
     'installable': True,
     'application': False,
     'auto_install': False,
@@ -0,0 +1,21 @@
+from odoo import _, http
+from odoo.exceptions import AccessError
+from odoo.http import request
+
+
+class ForceMailSmtpController(http.Controller):
+
+    @http.route('/force_mail_smtp/metrics', type='json', auth='user')
+    def queue_metrics(self, hours=24):
+        """
+        Endpoint JSON (administrateurs) : débit, latence file -> envoi, échecs
+        et nouveaux essais par serveur SMTP sur les dernières heures.
+        """
+        if not request.env.user.has_group('base.group_system'):
+            raise AccessError(_("Réservé aux administrateurs."))
+        Metric = request.env['mail.queue.metric'].sudo()
+        return {
+            'hours': int(hours),
+            'queue_outgoing': request.env['mail.mail'].sudo().search_count([('state', '=', 'outgoing')]),
+            'servers': Metric._get_summary(hours=int(hours)),
+        }
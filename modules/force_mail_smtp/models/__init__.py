@@ -1 +1,4 @@
 from . import mail_mail
+from . import ir_mail_server
+from . import mail_mail_archive
+from . import mail_queue_metric
@@ -0,0 +1,143 @@
+import random
+
+from odoo import api, fields, models, tools, _
+
+FORCED_SERVER_PARAM = 'force_mail_smtp.mail_server_id'
+# Répartition entre serveurs : 'single' (serveur forcé), 'round_robin', 'weighted', 'company'
+ROUTING_POLICY_PARAM = 'force_mail_smtp.routing_policy'
+ROUTING_POLICIES = ('single', 'round_robin', 'weighted', 'company')
+
+
+class IrMailServer(models.Model):
+    _inherit = 'ir.mail_server'
+
+    is_forced_server = fields.Boolean(
+        string="Serveur forcé",
+        compute='_compute_is_forced_server',
+        inverse='_inverse_is_forced_server',
+        help="Serveur imposé à tous les mail.mail (force_mail_smtp). "
+             "Sans serveur explicitement choisi, le premier serveur est utilisé.",
+    )
+
+    routing_weight = fields.Integer(
+        string="Poids (répartition)", default=1,
+        help="Part relative des mails attribués à ce serveur (politique 'weighted').",
+    )
+    routing_company_id = fields.Many2one(
+        'res.company', string="Société (répartition)",
+        help="Serveur réservé aux mails créés dans cette société (politique 'company').",
+    )
+    queue_cron_id = fields.Many2one(
+        'ir.cron', string="Cron de file dédié", readonly=True, copy=False, ondelete='set null',
+        help="Traite la file de ce serveur dans son propre worker cron, en parallèle des autres.",
+    )
+
+    def _compute_is_forced_server(self):
+        forced_id = self._get_forced_mail_server_id()
+        for server in self:
+            server.is_forced_server = server.id == forced_id
+
+    def _inverse_is_forced_server(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        for server in self:
+            if server.is_forced_server:
+                ICP.set_param(FORCED_SERVER_PARAM, server.id)
+            elif int(ICP.get_param(FORCED_SERVER_PARAM, 0) or 0) == server.id:
+                ICP.set_param(FORCED_SERVER_PARAM, False)
+
+    @api.model
+    @tools.ormcache()
+    def _get_forced_mail_server_id(self):
+        """Serveur SMTP imposé : celui configuré (ir.config_parameter), sinon le premier.
+        Résolu une fois par registre ; invalidé quand les serveurs ou le paramètre changent."""
+        servers = self.sudo()
+        param = servers.env['ir.config_parameter'].get_param(FORCED_SERVER_PARAM)
+        server = servers.browse(int(param)).exists() if param and param.isdigit() else servers
+        if not server or not server.active:
+            server = servers.search([], limit=1)
+        return server.id or False
+
+    # ---------- Répartition multi-serveurs ----------
+    @api.model
+    def _get_routing_policy(self):
+        policy = self.env['ir.config_parameter'].sudo().get_param(ROUTING_POLICY_PARAM, 'single')
+        return policy if policy in ROUTING_POLICIES else 'single'
+
+    @api.model
+    @tools.ormcache()
+    def _get_routing_servers(self):
+        """Serveurs actifs (id, poids, société), dans l'ordre de séquence ; cache registre."""
+        return tuple(
+            (server.id, server.routing_weight, server.routing_company_id.id)
+            for server in self.sudo().search([])
+        )
+
+    @api.model
+    def _get_managed_server_ids(self):
+        """Serveurs dont ce module gère l'attribution (et l'envoi groupé)."""
+        if self._get_routing_policy() == 'single':
+            forced_id = self._get_forced_mail_server_id()
+            return {forced_id} if forced_id else set()
+        return {server[0] for server in self._get_routing_servers()}
+
+    @api.model
+    def _assign_mail_servers(self, count):
+        """Liste de `count` ids de serveurs selon la politique de répartition."""
+        policy = self._get_routing_policy()
+        servers = self._get_routing_servers()
+        forced_id = self._get_forced_mail_server_id()
+        if policy == 'company':
+            company_id = self.env.company.id
+            servers = [s for s in servers if s[1] > 0 and s[2] == company_id] \
+                or [s for s in servers if s[1] > 0 and not s[2]]
+        elif policy != 'single':
+            servers = [s for s in servers if s[1] > 0]
+        if policy == 'single' or not servers:
+            return [forced_id] * count
+        server_ids = [s[0] for s in servers]
+        if policy == 'weighted':
+            return random.choices(server_ids, weights=[s[1] for s in servers], k=count)
+        # round_robin / company : tourniquet, départ aléatoire pour les petits lots
+        start = random.randrange(len(server_ids))
+        return [server_ids[(start + i) % len(server_ids)] for i in range(count)]
+
+    @api.model
+    def _get_dedicated_queue_server_ids(self):
+        return self.sudo().search([('queue_cron_id.active', '=', True)]).ids
+
+    def action_create_queue_cron(self):
+        """Crée un cron de file propre à chaque serveur (workers cron parallèles)."""
+        model = self.env['ir.model']._get('mail.mail')
+        for server in self.sudo().filtered(lambda s: not s.queue_cron_id):
+            server.queue_cron_id = self.env['ir.cron'].sudo().create({
+                'name': _("Mail : file du serveur %s", server.name),
+                'model_id': model.id,
+                'state': 'code',
+                'code': "model._process_email_queue_for_server(%d)" % server.id,
+                'interval_number': 1,
+                'interval_type': 'minutes',
+                'numbercall': -1,
+            })
+        return True
+
+    def action_remove_queue_cron(self):
+        self.sudo().queue_cron_id.unlink()
+        return True
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        servers = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return servers
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        # Le cron de file dédié viserait sinon un serveur supprimé
+        self.sudo().queue_cron_id.unlink()
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
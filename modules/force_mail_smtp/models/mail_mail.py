@@ -1,26 +1,266 @@
-from odoo import models, api
+import logging
+import smtplib
+import time
+from datetime import timedelta
+
+from odoo import models, api, fields, tools, _
+from odoo.addons.base.models.ir_mail_server import MailDeliveryException
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+# Rétention des mails envoyés (ir.config_parameter)
+RETENTION_DAYS_PARAM = 'force_mail_smtp.retention_days'
+RETENTION_MODE_PARAM = 'force_mail_smtp.retention_mode'  # 'archive' | 'purge_body'
+DEFAULT_RETENTION_DAYS = 90
+RETENTION_BATCH_SIZE = 1000
+RETENTION_TIME_LIMIT = 600  # secondes par exécution du cron
+
+# Envoi groupé sur le serveur forcé : une session SMTP réutilisée par lot
+MAX_PER_CONNECTION_PARAM = 'force_mail_smtp.max_messages_per_connection'
+DEFAULT_MAX_PER_CONNECTION = 200
+
+
+def _get_int_param(ICP, key, default):
+    """Paramètre entier ; valeur par défaut (et avertissement) si la valeur est invalide."""
+    value = ICP.get_param(key, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        _logger.warning("force_mail_smtp: invalid value %r for %s, using %s", value, key, default)
+        return default
+
 
 class MailMail(models.Model):
     _inherit = 'mail.mail'
 
-    @api.model
-    def create(self, vals):
-        # Force suppression automatique à False
-        vals['auto_delete'] = False
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Serveurs SMTP attribués en une fois pour tout le lot (forcé ou réparti)
+        smtp_server_ids = self.env['ir.mail_server']._assign_mail_servers(len(vals_list))
+        for vals, smtp_server_id in zip(vals_list, smtp_server_ids):
+            # Force suppression automatique à False
+            vals['auto_delete'] = False
 
-        # Forcer l'utilisation du serveur SMTP configuré
-        smtp_server = self.env['ir.mail_server'].search([], limit=1)
-        if smtp_server:
-            vals['mail_server_id'] = smtp_server.id
+            # Forcer l'utilisation du serveur SMTP configuré
+            if smtp_server_id:
+                vals['mail_server_id'] = smtp_server_id
 
-        return super(MailMail, self).create(vals)
+        return super(MailMail, self).create(vals_list)
     
     def write(self, vals):
         # Si l'objet est modifié ultérieurement, on force à nouveau les valeurs
         vals.setdefault('auto_delete', False)
 
-        smtp_server = self.env['ir.mail_server'].search([], limit=1)
-        if smtp_server:
-            vals.setdefault('mail_server_id', smtp_server.id)
+        # (en mode réparti, on garde le serveur attribué à la création)
+        IrMailServer = self.env['ir.mail_server']
+        smtp_server_id = IrMailServer._get_routing_policy() == 'single' and IrMailServer._get_forced_mail_server_id()
+        if smtp_server_id:
+            vals.setdefault('mail_server_id', smtp_server_id)
 
         return super(MailMail, self).write(vals)
+
+    # ---------- Envoi groupé (session SMTP partagée) ----------
+    def send(self, auto_commit=False, raise_exception=False):
+        """Les mails des serveurs gérés (forcé ou répartis) passent par _send_pooled ;
+        les autres (serveur modifié à la main) gardent l'envoi standard."""
+        managed_ids = self.env['ir.mail_server']._get_managed_server_ids()
+        if not managed_ids or self.env.context.get('force_mail_smtp_no_pool'):
+            return super().send(auto_commit=auto_commit, raise_exception=raise_exception)
+        pooled = self.filtered(lambda m: m.mail_server_id.id in managed_ids)
+        others = self - pooled
+        if others:
+            super(MailMail, others).send(auto_commit=auto_commit, raise_exception=raise_exception)
+        if pooled:
+            pooled._send_pooled(auto_commit=auto_commit, raise_exception=raise_exception)
+        return True
+
+    @api.model
+    def process_email_queue(self, ids=None):
+        # Les serveurs ayant leur propre cron de file sont exclus de la file générale
+        if not self.env.context.get('force_mail_smtp_server_id'):
+            dedicated_ids = self.env['ir.mail_server']._get_dedicated_queue_server_ids()
+            if dedicated_ids:
+                filters = list(self.env.context.get('filters') or [])
+                filters.append(('mail_server_id', 'not in', dedicated_ids))
+                self = self.with_context(filters=filters)
+        return super().process_email_queue(ids=ids)
+
+    @api.model
+    def _process_email_queue_for_server(self, mail_server_id):
+        """File d'un seul serveur (cron dédié, exécuté en parallèle des autres)."""
+        return self.with_context(
+            force_mail_smtp_server_id=mail_server_id,
+            filters=[('mail_server_id', '=', mail_server_id)],
+        ).process_email_queue()
+
+    def _postprocess_smtp_failure(self, exc):
+        """Même traitement que send() natif quand la connexion SMTP échoue."""
+        self.write({
+            'state': 'exception',
+            'failure_type': 'mail_smtp',
+            'failure_reason': tools.exception_to_unicode(exc),
+        })
+        self._postprocess_sent_message(success_pids=[], failure_type='mail_smtp')
+
+    def _send_pooled(self, auto_commit=False, raise_exception=False):
+        """
+        Une connexion SMTP pour au plus `max_messages_per_connection` mails.
+        Si la session tombe en cours de lot (_send relance SMTPServerDisconnected),
+        on se reconnecte et on renvoie une fois les mails du lot non encore traités,
+        y compris celui dont l'envoi a été interrompu.
+        Débit journalisé en fin d'envoi.
+        """
+        IrMailServer = self.env['ir.mail_server']
+        max_per_conn = max(1, _get_int_param(
+            self.env['ir.config_parameter'].sudo(), MAX_PER_CONNECTION_PARAM, DEFAULT_MAX_PER_CONNECTION))
+        stats = {'mails': 0, 'connections': 0, 'reconnects': 0}
+        started = time.monotonic()
+        for mail_server_id, alias_domain_id, smtp_from, batch_ids in self._split_by_mail_configuration():
+            for chunk_ids in split_every(max_per_conn, batch_ids):
+                chunk = self.browse(chunk_ids)
+                chunk_started = time.monotonic()
+                # Mise en file : création, ou date d'envoi programmée si elle est postérieure
+                enqueued = {m.id: max(filter(None, (m.create_date, m.scheduled_date)), default=None) for m in chunk}
+                retries = 0
+                todo = chunk
+                for attempt in range(2):
+                    try:
+                        smtp_session = IrMailServer.connect(mail_server_id=mail_server_id, smtp_from=smtp_from)
+                    except Exception as exc:
+                        if raise_exception:
+                            raise MailDeliveryException(_('Unable to connect to SMTP Server'), exc)
+                        _logger.exception("force_mail_smtp: SMTP connection failed (server %s)", mail_server_id)
+                        todo._postprocess_smtp_failure(exc)
+                        break
+                    stats['connections'] += 1
+                    # Un _send par mail sur la même session : on sait exactement lesquels
+                    # sont passés quand la session tombe (_send relance SMTPServerDisconnected)
+                    processed_ids = []
+                    try:
+                        for mail in todo:
+                            mail._send(auto_commit=auto_commit, raise_exception=raise_exception,
+                                       smtp_session=smtp_session, alias_domain_id=alias_domain_id)
+                            processed_ids.append(mail.id)
+                        break
+                    except smtplib.SMTPServerDisconnected as exc:
+                        # Mails non traités du lot, y compris celui en cours d'envoi
+                        # (que _send a pu passer en 'exception')
+                        todo = (todo - todo.browse(processed_ids)).exists()
+                        if attempt:
+                            if raise_exception:
+                                raise MailDeliveryException(_('Unable to connect to SMTP Server'), exc)
+                            _logger.exception("force_mail_smtp: SMTP session lost again (server %s)", mail_server_id)
+                            todo._postprocess_smtp_failure(exc)
+                            break
+                        if not todo:
+                            break
+                        stats['reconnects'] += 1
+                        retries = len(todo)
+                        _logger.warning("force_mail_smtp: SMTP session lost, retrying %s mails", len(todo))
+                        todo.write({'state': 'outgoing', 'failure_type': False, 'failure_reason': False})
+                    finally:
+                        try:
+                            smtp_session.quit()
+                        except Exception:
+                            pass
+                chunk._record_queue_metric(mail_server_id, chunk_started, enqueued, retries)
+                stats['mails'] += len(chunk_ids)
+        elapsed = time.monotonic() - started
+        _logger.info(
+            "force_mail_smtp: %s mails sent in %.2fs (%.1f msg/s), %s connections, %s reconnects",
+            stats['mails'], elapsed, stats['mails'] / elapsed if elapsed else 0.0,
+            stats['connections'], stats['reconnects'],
+        )
+        return stats
+
+    def _record_queue_metric(self, mail_server_id, started, enqueued, retries=0):
+        """
+        Enregistre débit, latence file -> envoi et échecs d'un lot envoyé.
+        Les mails supprimés après envoi (auto_delete) sont comptés comme envoyés ;
+        `enqueued` ({id: date de mise en file}) est donc lu avant l'envoi.
+        La latence ne porte que sur les mails effectivement envoyés.
+        """
+        duration = time.monotonic() - started
+        now = fields.Datetime.now()
+        remaining = self.exists()
+        failed_count = len(remaining.filtered(lambda m: m.state == 'exception'))
+        not_sent_ids = set(remaining.filtered(lambda m: m.state != 'sent').ids)
+        sent_ids = [mail_id for mail_id in self.ids if mail_id not in not_sent_ids]
+        sent_count = len(sent_ids)
+        latencies = [
+            max((now - enqueued[mail_id]).total_seconds(), 0.0)
+            for mail_id in sent_ids if enqueued.get(mail_id)
+        ]
+        self.env['mail.queue.metric'].sudo().create({
+            'mail_server_id': mail_server_id,
+            'date': now,
+            'mail_count': len(self),
+            'sent_count': sent_count,
+            'failed_count': failed_count,
+            'retry_count': retries,
+            'duration': duration,
+            'send_rate': sent_count / duration if duration else 0.0,
+            'latency_avg': sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_max': max(latencies, default=0.0),
+        })
+
+    # ---------- Rétention (mails jamais auto-supprimés) ----------
+    def _archive_values(self):
+        return [{
+            'mail_id': mail.id,
+            'message_id': mail.message_id,
+            'date': mail.date or mail.write_date,
+            'subject': mail.subject,
+            'email_from': mail.email_from,
+            'email_to': mail.email_to,
+            'email_cc': mail.email_cc,
+            'recipient_ids': ",".join(str(pid) for pid in mail.recipient_ids.ids),
+            'mail_server_id': mail.mail_server_id.id,
+            'model': mail.model,
+            'res_id': mail.res_id,
+            'state': mail.state,
+            'body_size': len((mail.body_html or '').encode()),
+        } for mail in self]
+
+    @api.model
+    def _gc_sent_mails(self, batch_size=RETENTION_BATCH_SIZE, time_limit=RETENTION_TIME_LIMIT, auto_commit=True):
+        """
+        Sort de la file les mails envoyés plus vieux que la rétention, par lots :
+        - 'archive' (défaut) : en-têtes copiés dans mail.mail.archive, puis suppression ;
+        - 'purge_body' : le mail reste, seul son corps (body_html) est vidé ; le
+          mail.message lié (historique du document) et ses pièces jointes, partagés
+          avec le chatter, sont conservés.
+        Un commit par lot ; s'arrête après `time_limit` secondes (reprise au prochain passage).
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        days = _get_int_param(ICP, RETENTION_DAYS_PARAM, DEFAULT_RETENTION_DAYS)
+        if days <= 0:
+            return 0
+        mode = ICP.get_param(RETENTION_MODE_PARAM, 'archive')
+        domain = [
+            ('state', '=', 'sent'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=days)),
+        ]
+        if mode == 'purge_body':
+            domain.append(('body_html', '!=', False))
+
+        Mail = self.sudo()
+        done = 0
+        started = time.monotonic()
+        while time.monotonic() - started < time_limit:
+            mails = Mail.search(domain, order='id', limit=batch_size)
+            if not mails:
+                break
+            if mode == 'purge_body':
+                # Sans repasser par write() : ne pas réimposer le serveur SMTP actuel
+                super(MailMail, mails).write({'body_html': False})
+            else:
+                self.env['mail.mail.archive'].sudo().create(mails._archive_values())
+                mails.unlink()
+            done += len(mails)
+            _logger.info("force_mail_smtp retention (%s): %s sent mails processed", mode, done)
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        return done
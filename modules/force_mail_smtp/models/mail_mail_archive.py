@@ -0,0 +1,24 @@
+from odoo import fields, models
+
+
+class MailMailArchive(models.Model):
+    """Trace compacte des mails envoyés retirés de la file mail.mail
+    (en-têtes et métadonnées, sans le corps)."""
+    _name = 'mail.mail.archive'
+    _description = "Archive des mails envoyés"
+    _order = 'date desc, id desc'
+    _rec_name = 'subject'
+
+    mail_id = fields.Integer(string="ID mail.mail d'origine", index=True, readonly=True)
+    message_id = fields.Char(string="Message-Id", index='btree_not_null', readonly=True)
+    date = fields.Datetime(string="Date d'envoi", index=True, readonly=True)
+    subject = fields.Char(string="Sujet", readonly=True)
+    email_from = fields.Char(string="De", readonly=True)
+    email_to = fields.Text(string="À", readonly=True)
+    email_cc = fields.Char(string="Cc", readonly=True)
+    recipient_ids = fields.Char(string="Partenaires destinataires (ids)", readonly=True)
+    mail_server_id = fields.Many2one('ir.mail_server', string="Serveur SMTP", ondelete='set null', readonly=True)
+    model = fields.Char(string="Modèle lié", readonly=True)
+    res_id = fields.Many2oneReference(string="ID lié", model_field='model', readonly=True)
+    state = fields.Char(string="État", readonly=True)
+    body_size = fields.Integer(string="Taille du corps (octets)", readonly=True)
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+METRIC_RETENTION_DAYS = 30
+
+
+class MailQueueMetric(models.Model):
+    """Une ligne par lot envoyé sur une session SMTP partagée (force_mail_smtp)."""
+    _name = 'mail.queue.metric'
+    _description = "Métriques de la file mail"
+    _order = 'date desc, id desc'
+    _rec_name = 'mail_server_id'
+
+    mail_server_id = fields.Many2one('ir.mail_server', string="Serveur SMTP", index=True, ondelete='set null')
+    date = fields.Datetime(string="Date", index=True, default=fields.Datetime.now)
+    mail_count = fields.Integer(string="Mails")
+    sent_count = fields.Integer(string="Envoyés")
+    failed_count = fields.Integer(string="Échecs")
+    retry_count = fields.Integer(string="Nouveaux essais")
+    duration = fields.Float(string="Durée (s)", digits=(16, 3))
+    send_rate = fields.Float(string="Débit (mails/s)", digits=(16, 2), group_operator='avg')
+    latency_avg = fields.Float(string="Latence moyenne (s)", digits=(16, 1), group_operator='avg')
+    latency_max = fields.Float(string="Latence max (s)", digits=(16, 1), group_operator='max')
+
+    @api.model
+    def _get_summary(self, hours=24):
+        """Agrégats par serveur sur les `hours` dernières heures (endpoint admin)."""
+        since = fields.Datetime.now() - timedelta(hours=hours)
+        groups = self._read_group(
+            [('date', '>=', since)],
+            groupby=['mail_server_id'],
+            aggregates=[
+                '__count', 'mail_count:sum', 'sent_count:sum', 'failed_count:sum', 'retry_count:sum',
+                'duration:sum', 'latency_avg:avg', 'latency_max:max',
+            ],
+        )
+        return [{
+            'mail_server_id': server.id,
+            'mail_server': server.display_name,
+            'batches': batches,
+            'mails': mails,
+            'sent': sent,
+            'failed': failed,
+            'retries': retries,
+            'send_rate': sent / duration if duration else 0.0,
+            'latency_avg': latency_avg or 0.0,
+            'latency_max': latency_max or 0.0,
+        } for server, batches, mails, sent, failed, retries, duration, latency_avg, latency_max in groups]
+
+    @api.autovacuum
+    def _gc_old_metrics(self):
+        limit_date = fields.Datetime.now() - timedelta(days=METRIC_RETENTION_DAYS)
+        self.sudo().search([('date', '<', limit_date)]).unlink()
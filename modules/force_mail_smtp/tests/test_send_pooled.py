@@ -0,0 +1,96 @@
+import smtplib
+from unittest.mock import patch
+
+from odoo.tests import common
+
+
+class FakeSMTPSession:
+    """Session SMTP locale : compte les mails et peut « tomber » une fois."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def noop(self):
+        return (250, b'OK')
+
+    def quit(self):
+        self.server.closed += 1
+
+
+class FakeSMTPServer:
+
+    def __init__(self, disconnect_at=None, refuse_connection=False):
+        self.sessions = 0
+        self.closed = 0
+        self.sent = []
+        self.disconnect_at = disconnect_at
+        self.refuse_connection = refuse_connection
+
+    def connect(self, *args, **kwargs):
+        if self.refuse_connection:
+            raise ConnectionRefusedError("connection refused")
+        self.sessions += 1
+        return FakeSMTPSession(self)
+
+    def send_email(self, message, *args, **kwargs):
+        if self.disconnect_at is not None and len(self.sent) == self.disconnect_at:
+            self.disconnect_at = None
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        self.sent.append(message['To'])
+        return message['Message-Id']
+
+
+class TestSendPooled(common.TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.mail_server = cls.env['ir.mail_server'].create({
+            'name': 'Test SMTP',
+            'smtp_host': 'localhost',
+            'is_forced_server': True,
+        })
+        cls.env['ir.config_parameter'].sudo().set_param('force_mail_smtp.max_messages_per_connection', 2)
+        cls.mails = cls.env['mail.mail'].create([{
+            'subject': 'Test %s' % index,
+            'body_html': '<p>Test</p>',
+            'email_from': 'sender@example.com',
+            'email_to': 'rcpt%s@example.com' % index,
+        } for index in range(5)])
+
+    def _send_with(self, fake_server, raise_exception=False):
+        IrMailServer = type(self.env['ir.mail_server'])
+        with patch.object(IrMailServer, 'connect', side_effect=fake_server.connect), \
+                patch.object(IrMailServer, 'send_email', side_effect=fake_server.send_email):
+            return self.mails._send_pooled(raise_exception=raise_exception)
+
+    def test_chunks_per_connection(self):
+        self.assertEqual(self.mails.mail_server_id, self.mail_server)
+        fake_server = FakeSMTPServer()
+        stats = self._send_with(fake_server)
+        self.assertEqual(fake_server.sessions, 3)
+        self.assertEqual(fake_server.closed, 3)
+        self.assertEqual(len(fake_server.sent), 5)
+        self.assertEqual(stats, {'mails': 5, 'connections': 3, 'reconnects': 0})
+        self.assertEqual(set(self.mails.mapped('state')), {'sent'})
+
+    def test_reconnect_on_lost_session(self):
+        fake_server = FakeSMTPServer(disconnect_at=1)
+        stats = self._send_with(fake_server)
+        # 2e mail du 1er lot : reconnexion et renvoi des seuls mails encore en file
+        self.assertEqual(stats['reconnects'], 1)
+        self.assertEqual(fake_server.sessions, 4)
+        self.assertEqual(fake_server.closed, 4)
+        self.assertEqual(len(fake_server.sent), 5)
+        self.assertEqual(len(set(fake_server.sent)), 5)
+        self.assertEqual(set(self.mails.mapped('state')), {'sent'})
+        metric = self.env['mail.queue.metric'].search(
+            [('mail_server_id', '=', self.mail_server.id), ('retry_count', '>', 0)])
+        self.assertEqual(metric.retry_count, 1)
+
+    def test_connection_failure(self):
+        fake_server = FakeSMTPServer(refuse_connection=True)
+        self._send_with(fake_server)
+        self.assertEqual(set(self.mails.mapped('state')), {'exception'})
+        self.assertEqual(set(self.mails.mapped('failure_type')), {'mail_smtp'})
+        self.assertFalse(fake_server.sent)
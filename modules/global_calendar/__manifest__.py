@@ -2,7 +2,7 @@
 {
     "name": "Global Calendar",
     "summary": "Global Calendar: aggregates all dates from multiple configured models. (by user)",
-    "version": "17.0.1.2.0",
+    "version": "17.0.1.3.0",
     "category": "Productivity",
     "author": "Imène M",
     "license": "LGPL-3",
@@ -12,6 +12,7 @@
         "security/ir.model.access.csv",
         "views/global_calendar_event_views.xml",
         "views/global_calendar_source_views.xml",
+        "views/global_calendar_sync_run_views.xml",
         "data/cron.xml",
         "data/actions.xml"
     ],
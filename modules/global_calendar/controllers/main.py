@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+
+from odoo import api, fields, http
+from odoo.http import request
+from odoo.modules.registry import Registry
+
+FEED_CHUNK_SIZE = 500
+FEED_DEFAULT_PAST_DAYS = 30
+FEED_DEFAULT_FUTURE_DAYS = 365
+FEED_MAX_RANGE_DAYS = 731
+FEED_CONTENT_TYPES = {
+    "ics": "text/calendar; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+
+def _ics_escape(value):
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line):
+    """Coupe les lignes ICS à 75 octets (RFC 5545 §3.1)."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts = []
+    while raw:
+        size = 75 if not parts else 74
+        chunk = raw[:size]
+        # ne pas couper au milieu d'un caractère UTF-8
+        while chunk and (raw[len(chunk):len(chunk) + 1] or b"\x00")[0] & 0xC0 == 0x80:
+            chunk = chunk[:-1]
+        parts.append(chunk.decode("utf-8"))
+        raw = raw[len(chunk):]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_event(ev):
+    if ev.all_day:
+        stop = (ev.stop or ev.start).date() + timedelta(days=1)
+        dates = [
+            "DTSTART;VALUE=DATE:%s" % ev.start.strftime("%Y%m%d"),
+            "DTEND;VALUE=DATE:%s" % stop.strftime("%Y%m%d"),
+        ]
+    else:
+        dates = [
+            "DTSTART:%s" % ev.start.strftime("%Y%m%dT%H%M%SZ"),
+            "DTEND:%s" % (ev.stop or ev.start).strftime("%Y%m%dT%H%M%SZ"),
+        ]
+    lines = [
+        "BEGIN:VEVENT",
+        "UID:%s-%s-%s@global_calendar" % (ev.model_name, ev.res_id, ev.source_id.id or 0),
+        "DTSTAMP:%s" % (ev.write_date or ev.start).strftime("%Y%m%dT%H%M%SZ"),
+        *dates,
+        "SUMMARY:%s" % _ics_escape(ev.name),
+        "CATEGORIES:%s" % _ics_escape(ev.source_id.name or ev.model_name),
+        "END:VEVENT",
+    ]
+    return "".join(_ics_fold(line) for line in lines)
+
+
+def _ndjson_event(ev):
+    return json.dumps({
+        "id": ev.id,
+        "name": ev.name,
+        "start": fields.Datetime.to_string(ev.start),
+        "stop": fields.Datetime.to_string(ev.stop),
+        "all_day": ev.all_day,
+        "source": ev.source_id.name or None,
+        "model": ev.model_name,
+        "res_id": ev.res_id,
+        "color": ev.color_hex_effective,
+    }) + "\n"
+
+
+class GlobalCalendarFeedController(http.Controller):
+
+    def _feed_domain(self, user, date_from, date_to):
+        """Événements visibles par l'utilisateur (cf. filtre 'My events') qui
+        chevauchent [date_from, date_to]."""
+        return [
+            "|", ("allow_all_users", "=", True), ("user_ids", "in", [user.id]),
+            ("start", "<=", date_to),
+            "|", ("stop", ">=", date_from), "&", ("stop", "=", False), ("start", ">=", date_from),
+        ]
+
+    def _parse_range(self, start, end):
+        today = fields.Date.today()
+        try:
+            date_from = fields.Date.from_string(start) if start else today - timedelta(days=FEED_DEFAULT_PAST_DAYS)
+            date_to = fields.Date.from_string(end) if end else today + timedelta(days=FEED_DEFAULT_FUTURE_DAYS)
+        except ValueError:
+            return False, False
+        # Plage inversée ou trop large (flux borné) : refusée
+        if date_from > date_to or (date_to - date_from).days > FEED_MAX_RANGE_DAYS:
+            return False, False
+        return datetime.combine(date_from, time.min), datetime.combine(date_to, time.max)
+
+    def _stream_events(self, dbname, domain, fmt):
+        """Générateur : curseur dédié (celui de la requête est fermé quand le
+        corps est consommé) et pagination par id pour borner la mémoire."""
+        render = _ics_event if fmt == "ics" else _ndjson_event
+        with Registry(dbname).cursor() as cr:
+            env = api.Environment(cr, api.SUPERUSER_ID, {})
+            Event = env["global.calendar.event"]
+            if fmt == "ics":
+                yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Odoo//Global Calendar//EN\r\nCALSCALE:GREGORIAN\r\n"
+            last_id = 0
+            while True:
+                events = Event.search(domain + [("id", ">", last_id)], order="id", limit=FEED_CHUNK_SIZE)
+                if not events:
+                    break
+                for ev in events:
+                    yield render(ev)
+                last_id = events[-1].id
+                env.invalidate_all()
+            if fmt == "ics":
+                yield "END:VCALENDAR\r\n"
+
+    @http.route("/global_calendar/feed/<string:token>.<string:fmt>", type="http", auth="public", methods=["GET"])
+    def global_calendar_feed(self, token, fmt, start=None, end=None, **kw):
+        if fmt not in FEED_CONTENT_TYPES or not token:
+            return request.not_found()
+        user = request.env["res.users"].sudo().search([
+            ("global_calendar_feed_token", "=", token),
+        ], limit=1)
+        if not user:
+            return request.not_found()
+        date_from, date_to = self._parse_range(start, end)
+        if not date_from:
+            return request.make_response("Invalid date range", status=400)
+
+        domain = self._feed_domain(user, date_from, date_to)
+        # ETag : max(write_date) + nombre d'événements (les suppressions changent le nombre),
+        # et max(write_date) des sources concernées : couleur et nom (color / CATEGORIES)
+        # viennent de la source et ne touchent plus les événements
+        groups = request.env["global.calendar.event"].sudo()._read_group(
+            domain, groupby=["source_id"], aggregates=["write_date:max", "__count"],
+        )
+        sources = request.env["global.calendar.source"].sudo().union(*(source for source, _w, _c in groups))
+        last_write = max((w for _s, w, _c in groups if w), default=None)
+        count = sum(c for _s, _w, c in groups)
+        last_source_write = max(sources.mapped("write_date"), default=None)
+        etag = hashlib.sha1(
+            ("%s|%s|%s|%s|%s|%s|%s|%s" % (
+                user.id, fmt, date_from, date_to, last_write, count, sorted(sources.ids), last_source_write,
+            )).encode()
+        ).hexdigest()
+        headers = [("ETag", '"%s"' % etag), ("Cache-Control", "private, must-revalidate")]
+        if request.httprequest.if_none_match.contains(etag):
+            return request.make_response("", headers=headers, status=304)
+
+        headers.append(("Content-Type", FEED_CONTENT_TYPES[fmt]))
+        return request.make_response(self._stream_events(request.db, domain, fmt), headers=headers)
@@ -0,0 +1,10 @@
+# Couleurs, société et utilisateur principal ne sont plus stockés sur les
+# événements (servis depuis la source / user_ids) : suppression des colonnes.
+DROPPED_COLUMNS = ("color", "color_hex_effective", "text_color_hex", "company_id", "user_id")
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    for column in DROPPED_COLUMNS:
+        cr.execute(f"ALTER TABLE global_calendar_event DROP COLUMN IF EXISTS {column}")
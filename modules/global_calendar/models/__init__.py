@@ -1,3 +1,5 @@
 # -*- coding: utf-8 -*-
 from . import global_calendar_event
-from . import global_calendar_source
\ No newline at end of file
+from . import global_calendar_source
+from . import global_calendar_sync_run
+from . import res_users
@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
 import logging
-from odoo import api, fields, models
-from datetime import timedelta
+from odoo import api, fields, models, tools
 
 
 _logger = logging.getLogger("GLOBAL_CALENDAR")
 
+# Audit des écritures (ir.config_parameter) ; le niveau se règle via --log-handler
+_audit_logger = logging.getLogger("GLOBAL_CALENDAR.audit")
+AUDIT_MODE_PARAM = "global_calendar.event_write_audit"
+AUDIT_SAMPLE_PARAM = "global_calendar.event_write_audit_sample"
+AUDIT_SAMPLE_DEFAULT = 5
+
+DEFAULT_COLOR_HEX = "#3A53BB"
+
 def _normalize_hex(h):
     if not h:
         return False
@@ -20,6 +27,30 @@ def _normalize_hex(h):
         return False
     return "#" + s.upper()
 
+
+def _text_color_for(hex6):
+    """Texte blanc ou noir selon le meilleur contraste WCAG avec le fond."""
+    def _hex_to_rgb01(hex6):
+        s = (hex6 or "").lstrip("#")
+        if len(s) != 6:
+            s = DEFAULT_COLOR_HEX[1:]  # fallback
+        r = int(s[0:2], 16) / 255.0
+        g = int(s[2:4], 16) / 255.0
+        b = int(s[4:6], 16) / 255.0
+        return r, g, b
+
+    def _srgb_to_lin(v):
+        # Conversion sRGB -> lin (WCAG)
+        return v / 12.92 if v <= 0.03928 else ((v + 0.055) / 1.055) ** 2.4
+
+    r, g, b = _hex_to_rgb01(hex6)
+    L_bg = 0.2126 * _srgb_to_lin(r) + 0.7152 * _srgb_to_lin(g) + 0.0722 * _srgb_to_lin(b)
+    # Contraste avec blanc (L=1) et noir (L=0)
+    contrast_white = (1.0 + 0.05) / (L_bg + 0.05)
+    contrast_black = (max(L_bg, 0.0) + 0.05) / 0.05
+    return '#FFFFFF' if contrast_white >= contrast_black else '#000000'
+
+
 class GlobalCalendarEvent(models.Model):
     _name = "global.calendar.event"
     _description = "Global Calendar Event"
@@ -53,24 +84,23 @@ class GlobalCalendarEvent(models.Model):
     res_id = fields.Integer("Origin Record ID", required=True, index=True)
 
     # --- Couleurs ---
+    # Non stockées : servies depuis un cache par source (voir
+    # _get_source_display_values), pour ne plus les recalculer à chaque sync.
     color = fields.Integer(
         "Color (legacy index)",
-        compute="_compute_color_index_legacy",
-        store=True,
+        compute="_compute_display_from_source",
         compute_sudo=True,
     )
 
     color_hex_effective = fields.Char(
         string="Color HEX",
-        compute="_compute_color_hex_effective",
-        store=True,
+        compute="_compute_display_from_source",
         compute_sudo=True,
     )
 
     text_color_hex = fields.Char(
         string="Text Color HEX",
-        compute="_compute_text_color_hex",
-        store=True,
+        compute="_compute_display_from_source",
         compute_sudo=True,
     )
 
@@ -78,8 +108,8 @@ class GlobalCalendarEvent(models.Model):
     company_id = fields.Many2one(
         "res.company",
         string="Company",
-        compute="_compute_company",
-        store=True,
+        compute="_compute_user_company",
+        search="_search_company_id",
         compute_sudo=True,
     )
 
@@ -87,8 +117,8 @@ class GlobalCalendarEvent(models.Model):
     user_id = fields.Many2one(
         "res.users",
         string="User (primary)",
-        compute="_compute_user_id",
-        store=True,
+        compute="_compute_user_company",
+        search="_search_user_id",
         compute_sudo=True,
     )
 
@@ -97,88 +127,47 @@ class GlobalCalendarEvent(models.Model):
          "There is already a global calendar event for this record."),
     ]
 
+    # --- Lookup par couleur de source (cache registre) ---
+    @api.model
+    @tools.ormcache('color_hex', 'color_index')
+    def _get_source_display_values(self, color_hex, color_index):
+        """Retourne (color_index, color_hex, text_color_hex) pour les couleurs d'une source.
+        Clé = valeurs elles-mêmes : une modification de la source change la clé,
+        aucune invalidation du cache n'est nécessaire.
+        """
+        hx = _normalize_hex(color_hex) or DEFAULT_COLOR_HEX
+        return ((color_index or 0) % 12, hx, _text_color_for(hx))
+
     # --- Compute methods ---
-    @api.depends("user_ids")
-    def _compute_company(self):
+    @api.depends('user_ids', 'model_name', 'source_id', 'source_id.color_hex', 'source_id.color_index')
+    def _compute_display_from_source(self):
+        default_text = _text_color_for(DEFAULT_COLOR_HEX)
         for rec in self:
-            rec.company_id = rec.user_ids[:1].company_id.id if rec.user_ids else False
-
-    @api.depends('user_ids', 'model_name', 'source_id.color_hex', 'source_id.color_index')
-    def _compute_color_index_legacy(self):
-        def _fallback_index(rec):
+            source = rec.source_id
+            values = rec._get_source_display_values(source.color_hex, source.color_index) if source else None
+            if values:
+                rec.color, rec.color_hex_effective, rec.text_color_hex = values
+                continue
+            # Pas de source : index de repli (historique)
             base = rec.user_ids[:1].id if rec.user_ids else sum(ord(c) for c in (rec.model_name or ''))
-            return base % 12
-        for rec in self:
-            if rec.source_id and rec.source_id.color_index is not None:
-                rec.color = rec.source_id.color_index % 12
-            else:
-                rec.color = _fallback_index(rec)
-            # _logger.warning(
-            #     "[GLOBAL_CALENDAR][EVENT][COLOR_INDEX] event_id=%s idx=%s",
-            #     rec.id or 0, rec.color
-            # )
-
-    @api.depends('source_id.color_hex')
-    def _compute_color_hex_effective(self):
-        for rec in self:
-            hx = _normalize_hex(rec.source_id.color_hex if rec.source_id else None) or "#3A53BB"
-            rec.color_hex_effective = hx
-            # _logger.warning(
-            #     "[GLOBAL_CALENDAR][EVENT][COLOR_HEX] event_id=%s hex=%s",
-            #     rec.id or 0, hx
-            # )
-
-    # @api.depends('color_hex_effective')
-    # def _compute_text_color_hex(self):
-    #     def _luma(hex6):
-    #         s = hex6.lstrip("#")
-    #         r = int(s[0:2], 16)
-    #         g = int(s[2:4], 16)
-    #         b = int(s[4:6], 16)
-    #         return 0.2126*r + 0.7152*g + 0.0722*b
-    #     for rec in self:
-    #         hx = rec.color_hex_effective or "#3A53BB"
-    #         rec.text_color_hex = "#000000" if _luma(hx) > 186 else "#FFFFFF"
-
-    @api.depends('color_hex_effective')
-    def _compute_text_color_hex(self):
-        def _hex_to_rgb01(hex6):
-            s = (hex6 or "").lstrip("#")
-            if len(s) != 6:
-                s = "3A53BB"  # fallback
-            r = int(s[0:2], 16) / 255.0
-            g = int(s[2:4], 16) / 255.0
-            b = int(s[4:6], 16) / 255.0
-            return r, g, b
-
-        def _srgb_to_lin(v):
-            # Conversion sRGB -> lin (WCAG)
-            return v / 12.92 if v <= 0.03928 else ((v + 0.055) / 1.055) ** 2.4
-
-        def _relative_luminance(hex6):
-            r, g, b = _hex_to_rgb01(hex6)
-            R = _srgb_to_lin(r)
-            G = _srgb_to_lin(g)
-            B = _srgb_to_lin(b)
-            return 0.2126 * R + 0.7152 * G + 0.0722 * B
-
-        def _contrast_ratio(L1, L2):
-            # L1 >= L2
-            return (L1 + 0.05) / (L2 + 0.05)
+            rec.color = base % 12
+            rec.color_hex_effective = DEFAULT_COLOR_HEX
+            rec.text_color_hex = default_text
 
+    @api.depends('user_ids')
+    def _compute_user_company(self):
         for rec in self:
-            bg = rec.color_hex_effective or "#3A53BB"
-            L_bg = _relative_luminance(bg)
-            # Contraste avec blanc (L=1) et noir (L=0)
-            contrast_white = _contrast_ratio(1.0, L_bg)
-            contrast_black  = _contrast_ratio(max(L_bg, 0.0), 0.0)
-            rec.text_color_hex = '#FFFFFF' if contrast_white >= contrast_black else '#000000'
-
+            user = rec.user_ids[:1]
+            rec.user_id = user.id
+            rec.company_id = user.company_id.id
 
+    def _search_user_id(self, operator, value):
+        # "Un des utilisateurs" plutôt que "le premier" : le filtre du calendrier
+        # porte donc sur user_ids (même résultat que ce domaine)
+        return [('user_ids', operator, value)]
 
-    def _compute_user_id(self):
-        for rec in self:
-            rec.user_id = rec.user_ids[:1].id if rec.user_ids else False
+    def _search_company_id(self, operator, value):
+        return [('user_ids.company_id', operator, value)]
 
     # --- Logging hooks ---
     @api.model
@@ -193,10 +182,39 @@ class GlobalCalendarEvent(models.Model):
 
     def write(self, vals):
         res = super().write(vals)
-        for rec in self:
-            _logger.warning(
-                "[GLOBAL_CALENDAR][EVENT][UPDATE] event_id=%s changes=%s now name=%s start=%s stop=%s all_day=%s source=%s hex=%s",
-                rec.id, list(vals.keys()), rec.name, rec.start, rec.stop, rec.all_day,
-                rec.source_id.id if rec.source_id else None, rec.color_hex_effective
-            )
+        if not self.env.context.get("global_calendar_no_audit"):
+            self._audit_writes(list(vals))
         return res
+
+    # --- Audit des écritures ---
+    @api.model
+    def _audit_mode(self):
+        """Mode d'audit des écritures : 'off' (défaut), 'summary' ou 'sample'."""
+        mode = self.env["ir.config_parameter"].sudo().get_param(AUDIT_MODE_PARAM, "off")
+        return mode if mode in ("summary", "sample") else "off"
+
+    def _audit_writes(self, field_names, origin="write"):
+        """Une ligne de synthèse par lot d'écritures ; en mode 'sample', détail
+        (au niveau DEBUG) des premiers enregistrements seulement.
+        Ne lit aucun champ quand l'audit est désactivé."""
+        if not self:
+            return
+        mode = self._audit_mode()
+        if mode == "off" or not _audit_logger.isEnabledFor(logging.INFO):
+            return
+        _audit_logger.info(
+            "[GLOBAL_CALENDAR][EVENT][%s] count=%s fields=%s first_id=%s",
+            origin.upper(), len(self), sorted(field_names), self[:1].id,
+        )
+        if mode == "sample" and _audit_logger.isEnabledFor(logging.DEBUG):
+            # Un paramètre de journalisation invalide ne doit jamais bloquer l'écriture
+            value = self.env["ir.config_parameter"].sudo().get_param(AUDIT_SAMPLE_PARAM, AUDIT_SAMPLE_DEFAULT)
+            try:
+                size = int(value)
+            except (TypeError, ValueError):
+                size = AUDIT_SAMPLE_DEFAULT
+            for rec in self[:max(size, 0)]:
+                _audit_logger.debug(
+                    "[GLOBAL_CALENDAR][EVENT][%s] event_id=%s name=%s start=%s stop=%s source=%s",
+                    origin.upper(), rec.id, rec.name, rec.start, rec.stop, rec.source_id.id,
+                )
@@ -2,10 +2,11 @@
 import logging
 from ast import literal_eval
 from datetime import datetime, time, timedelta
+from time import perf_counter as time_counter
 
 import re
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError
 from odoo.tools.safe_eval import safe_eval
 
@@ -107,6 +108,9 @@ class GlobalCalendarSource(models.Model):
             before_idx = rec.color_index
             before_model = rec.model_id.model
             before_name = rec.name
+        # Pas d'invalidation de cache : les couleurs des événements
+        # (_get_source_display_values) et les domaines compilés (_compile_domain)
+        # sont mis en cache par valeur, une modification change la clé
         res = super().write(vals)
         for rec in self:
             after_hex = rec.color_hex
@@ -121,16 +125,63 @@ class GlobalCalendarSource(models.Model):
 
     # -------------------------
 
-    def _parse_domain(self):
-        if not self.domain_filter:
-            return []
+    @api.constrains('domain_filter', 'model_id')
+    def _check_domain_filter(self):
+        for rec in self:
+            if rec.domain_filter and rec.model_id:
+                rec._parse_domain()
+
+    @api.model
+    @tools.ormcache('model_name', 'domain_text')
+    def _compile_domain(self, model_name, domain_text):
+        """Évalue et valide un domaine une seule fois (cache registre).
+        Retourne un tuple pour que la valeur en cache ne soit pas modifiée.
+        """
         try:
-            return safe_eval(self.domain_filter.strip())
+            domain = safe_eval(domain_text)
         except Exception:
             try:
-                return literal_eval(self.domain_filter.strip())
+                domain = literal_eval(domain_text)
             except Exception as e:
                 raise UserError(_("Invalid domain: %s") % e)
+        if not isinstance(domain, (list, tuple)):
+            raise UserError(_("Invalid domain: a list is expected."))
+        Model = self.env[model_name]
+        for leaf in domain:
+            if isinstance(leaf, str):
+                if leaf not in ('&', '|', '!'):
+                    raise UserError(_("Invalid domain operator: %s") % leaf)
+                continue
+            if not isinstance(leaf, (list, tuple)) or len(leaf) != 3:
+                raise UserError(_("Invalid domain leaf: %s") % (leaf,))
+            if tuple(leaf) in ((1, '=', 1), (0, '=', 1)):
+                continue
+            fname = str(leaf[0]).split('.', 1)[0]
+            if fname not in Model._fields:
+                raise UserError(_("Invalid domain: field %(field)s does not exist on %(model)s.",
+                                  field=fname, model=model_name))
+        return tuple(domain)
+
+    def _parse_domain(self):
+        if not self.domain_filter or not self.domain_filter.strip():
+            return []
+        return list(self._compile_domain(self.model_id.model, self.domain_filter.strip()))
+
+    def action_preview_count(self):
+        """Compte les enregistrements ciblés par le domaine, sans lancer de sync."""
+        self.ensure_one()
+        count = self.env[self.model_id.model].search_count(self._parse_domain())
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': self.name,
+                'message': _("%(count)s record(s) of %(model)s match this source.",
+                             count=count, model=self.model_id.model),
+                'type': 'info',
+                'sticky': False,
+            },
+        }
 
     def _field_value(self, record, field):
         return getattr(record, field.name) if field else False
@@ -176,8 +227,93 @@ class GlobalCalendarSource(models.Model):
             # _logger.warning("[GLOBAL_CALENDAR][CRON_SYNC] source_id=%s model=%s", source.id, source.model_id.model)
             source._sync_source()
 
+    def _event_needs_update(self, ev, vals, user_ids):
+        """Vrai si l'événement existant diffère des valeurs projetées."""
+        def _same_dt(a, b):
+            # Les microsecondes (time.max) ne survivent pas forcément au stockage
+            return (a and a.replace(microsecond=0)) == (b and b.replace(microsecond=0))
+        return (
+            ev.name != vals["name"]
+            or not _same_dt(ev.start, vals["start"])
+            or not _same_dt(ev.stop, vals["stop"])
+            or ev.all_day != vals["all_day"]
+            or ev.allow_all_users != vals["allow_all_users"]
+            or ev.source_id.id != vals["source_id"]
+            or sorted(ev.user_ids.ids) != user_ids
+        )
+
+    def _project_record(self, rec):
+        """Calcule (vals, user_ids) de l'événement pour un enregistrement source,
+        ou (False, False) si l'enregistrement n'a pas de date de début."""
+        start_raw = self._field_value(rec, self.start_field_id)
+        stop_raw = self._field_value(rec, self.stop_field_id) if self.stop_field_id else False
+        start_dt, start_all_day = self._to_datetime(start_raw, is_stop=False)
+        #stop_dt, stop_all_day = self._to_datetime(stop_raw, is_stop=True) if stop_raw else (start_dt, start_all_day)
+        stop_dt, stop_all_day = (self._to_datetime(stop_raw, is_stop=True) if stop_raw else (False, False))
+
+        # Fallback: si pas de stop, on tente la durée depuis duration_field_id (en heures)
+        if not stop_dt:
+            dur_val = False
+            if self.duration_field_id:
+                try:
+                    dur_val = self._field_value(rec, self.duration_field_id)
+                except Exception:
+                    dur_val = False
+            try:
+                dur = float(dur_val) if dur_val is not False and dur_val is not None else 0.0
+            except Exception:
+                dur = 0.0
+
+            if start_dt and dur > 0.0:
+                stop_dt = start_dt + timedelta(hours=dur)
+                stop_all_day = False
+            else:
+                # dernier recours: événement instantané (comportement historique)
+                stop_dt, stop_all_day = start_dt, start_all_day
+
+        if not start_dt:
+            return False, False
+
+        title = self._title_from_record(rec, self.title_field_id)
+
+        user_ids = []
+        if self.user_m2o_field_id:
+            u = self._field_value(rec, self.user_m2o_field_id)
+            if u:
+                user_ids.append(u.id)
+        if self.user_m2m_field_id:
+            usets = self._field_value(rec, self.user_m2m_field_id)
+            if usets:
+                user_ids.extend(usets.ids)
+        user_ids = list(sorted(set(user_ids)))
+        allow_all = self.visible_to_everyone if not user_ids else False
+
+        vals = {
+            "name": title,
+            "start": start_dt,
+            "stop": stop_dt,
+            "all_day": bool(start_all_day or stop_all_day),
+            "user_ids": [(6, 0, user_ids)],
+            "allow_all_users": allow_all,
+            "source_id": self.id,
+            "model_name": self.model_id.model,
+            "res_id": rec.id,
+        }
+        return vals, user_ids
+
     def _sync_source(self):
         self.ensure_one()
+        cr = self.env.cr
+        date_start = fields.Datetime.now()
+        t_begin = time_counter()
+        queries_begin = cr.sql_log_count
+        stats = dict.fromkeys((
+            "scanned_count", "created_count", "updated_count", "unchanged_count", "removed_count",
+        ), 0)
+        timings = dict.fromkeys((
+            "scan_duration", "projection_duration", "write_duration", "cleanup_duration",
+        ), 0.0)
+
         Model = self.env[self.model_id.model]
         domain = self._parse_domain()
 
@@ -189,111 +325,76 @@ class GlobalCalendarSource(models.Model):
         offset = 0
         limit = max(1, self.sync_chunk_size)
         seen = set()
-        created = 0
-        updated = 0
-
-        # _logger.warning(
-        #     "[GLOBAL_CALENDAR][SYNC][SCAN] source_id=%s model=%s domain=%s batch=%s",
-        #     self.id, self.model_id.model, domain, limit
-        # )
 
         while True:
+            t0 = time_counter()
             batch = Model.search(domain, offset=offset, limit=limit, order="id asc")
+            timings["scan_duration"] += time_counter() - t0
             if not batch:
                 break
+            stats["scanned_count"] += len(batch)
+
+            t0 = time_counter()
+            projected = []
             for rec in batch:
-                start_raw = self._field_value(rec, self.start_field_id)
-                stop_raw = self._field_value(rec, self.stop_field_id) if self.stop_field_id else False
-                start_dt, start_all_day = self._to_datetime(start_raw, is_stop=False)
-                #stop_dt, stop_all_day = self._to_datetime(stop_raw, is_stop=True) if stop_raw else (start_dt, start_all_day)
-                stop_dt, stop_all_day = (self._to_datetime(stop_raw, is_stop=True) if stop_raw else (False, False))
-                
-                # Fallback: si pas de stop, on tente la durée depuis duration_field_id (en heures)
-                if not stop_dt:
-                    dur_val = False
-                    if self.duration_field_id:
-                        try:
-                            dur_val = self._field_value(rec, self.duration_field_id)
-                        except Exception:
-                            dur_val = False
-                    try:
-                        dur = float(dur_val) if dur_val is not False and dur_val is not None else 0.0
-                    except Exception:
-                        dur = 0.0
-
-                    if start_dt and dur > 0.0:
-                        stop_dt = start_dt + timedelta(hours=dur)
-                        stop_all_day = False
-                    else:
-                        # dernier recours: événement instantané (comportement historique)
-                        stop_dt, stop_all_day = start_dt, start_all_day
-
-                if not start_dt:
-                    continue
-
-                title = self._title_from_record(rec, self.title_field_id)
-
-                user_ids = []
-                if self.user_m2o_field_id:
-                    u = self._field_value(rec, self.user_m2o_field_id)
-                    if u:
-                        user_ids.append(u.id)
-                if self.user_m2m_field_id:
-                    usets = self._field_value(rec, self.user_m2m_field_id)
-                    if usets:
-                        user_ids.extend(usets.ids)
-                user_ids = list(sorted(set(user_ids)))
-                allow_all = self.visible_to_everyone if not user_ids else False
-
-                vals = {
-                    "name": title,
-                    "start": start_dt,
-                    "stop": stop_dt,
-                    "all_day": bool(start_all_day or stop_all_day),
-                    "user_ids": [(6, 0, user_ids)],
-                    "allow_all_users": allow_all,
-                    "source_id": self.id,
-                    "model_name": self.model_id.model,
-                    "res_id": rec.id,
-                }
-
-                ev = existing_by_res.get(rec.id)
+                vals, user_ids = self._project_record(rec)
+                if vals:
+                    projected.append((rec.id, vals, user_ids))
+            timings["projection_duration"] += time_counter() - t0
+
+            t0 = time_counter()
+            Event = self.env["global.calendar.event"].with_context(global_calendar_no_audit=True)
+            written_ids = []
+            for res_id, vals, user_ids in projected:
+                ev = existing_by_res.get(res_id)
                 if ev:
-                    ev.write(vals)
-                    updated += 1
-                    # _logger.warning(
-                    #     "[GLOBAL_CALENDAR][SYNC][UPDATE] event_id=%s res=%s model=%s title=%s src_hex=%s src_idx=%s",
-                    #     ev.id, rec.id, self.model_id.model, title, self.color_hex, self.color_index
-                    # )
+                    if self._event_needs_update(ev, vals, user_ids):
+                        ev.with_context(global_calendar_no_audit=True).write(vals)
+                        written_ids.append(ev.id)
+                        stats["updated_count"] += 1
+                    else:
+                        stats["unchanged_count"] += 1
                 else:
-                    ev = self.env["global.calendar.event"].create(vals)
-                    existing_by_res[rec.id] = ev
-                    created += 1
-                    # _logger.warning(
-                    #     "[GLOBAL_CALENDAR][SYNC][CREATE] event_id=%s res=%s model=%s title=%s src_hex=%s src_idx=%s",
-                    #     ev.id, rec.id, self.model_id.model, title, self.color_hex, self.color_index
-                    # )
-                seen.add(rec.id)
+                    ev = Event.create(vals)
+                    existing_by_res[res_id] = ev
+                    stats["created_count"] += 1
+                seen.add(res_id)
+            # Audit : une synthèse par lot plutôt qu'une ligne par événement
+            Event.browse(written_ids)._audit_writes(["name", "start", "stop", "all_day", "user_ids", "allow_all_users"], origin="sync")
+            timings["write_duration"] += time_counter() - t0
 
             offset += limit
 
+        t0 = time_counter()
         to_unlink = self.env["global.calendar.event"].search([
             ("model_name", "=", self.model_id.model),
             ("res_id", "not in", list(seen) or [0]),
         ])
-        removed = len(to_unlink)
-        if removed:
-            # _logger.warning(
-            #     "[GLOBAL_CALENDAR][SYNC][CLEANUP] source_id=%s model=%s removed=%s",
-            #     self.id, self.model_id.model, removed
-            # )
+        stats["removed_count"] = len(to_unlink)
+        if to_unlink:
             to_unlink.unlink()
+        timings["cleanup_duration"] = time_counter() - t0
 
         self.last_sync = fields.Datetime.now()
-        # _logger.warning(
-        #     "[GLOBAL_CALENDAR][SYNC][SUMMARY] source_id=%s created=%s updated=%s removed=%s",
-        #     self.id, created, updated, removed
-        # )
+        self.env["global.calendar.sync.run"].sudo().create(dict(
+            stats, **timings,
+            source_id=self.id,
+            model_name=self.model_id.model,
+            date_start=date_start,
+            duration=time_counter() - t_begin,
+            query_count=cr.sql_log_count - queries_begin,
+        ))
+        _logger.info(
+            "[GLOBAL_CALENDAR][SYNC][SUMMARY] source_id=%s created=%s updated=%s unchanged=%s removed=%s",
+            self.id, stats["created_count"], stats["updated_count"],
+            stats["unchanged_count"], stats["removed_count"],
+        )
+
+    def action_open_sync_runs(self):
+        self.ensure_one()
+        action = self.env.ref("global_calendar.action_global_calendar_sync_run").read()[0]
+        action["domain"] = [("source_id", "=", self.id)]
+        return action
 
     def action_open_events(self):
         self.ensure_one()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+RETENTION_PARAM = "global_calendar.sync_run_retention_days"
+DEFAULT_RETENTION_DAYS = 30
+
+
+class GlobalCalendarSyncRun(models.Model):
+    _name = "global.calendar.sync.run"
+    _description = "Global Calendar Sync Run"
+    _order = "date_start desc, id desc"
+    _rec_name = "source_id"
+
+    source_id = fields.Many2one("global.calendar.source", string="Source", ondelete="cascade", index=True)
+    model_name = fields.Char("Origin Model")
+    date_start = fields.Datetime("Date", index=True, default=fields.Datetime.now)
+
+    # --- Volumes ---
+    scanned_count = fields.Integer("Scanned")
+    created_count = fields.Integer("Created")
+    updated_count = fields.Integer("Updated")
+    unchanged_count = fields.Integer("Unchanged")
+    removed_count = fields.Integer("Removed")
+
+    # --- Durées par phase (secondes) ---
+    duration = fields.Float("Total (s)", digits=(16, 3), group_operator="avg")
+    scan_duration = fields.Float("Scan (s)", digits=(16, 3), group_operator="avg")
+    projection_duration = fields.Float("Projection (s)", digits=(16, 3), group_operator="avg")
+    write_duration = fields.Float("Write (s)", digits=(16, 3), group_operator="avg")
+    cleanup_duration = fields.Float("Cleanup (s)", digits=(16, 3), group_operator="avg")
+
+    query_count = fields.Integer("SQL queries", group_operator="avg")
+
+    @api.autovacuum
+    def _gc_old_runs(self):
+        """Supprime l'historique plus ancien que la rétention configurée (jours)."""
+        days = int(self.env["ir.config_parameter"].sudo().get_param(RETENTION_PARAM, DEFAULT_RETENTION_DAYS))
+        if days <= 0:
+            return
+        limit_date = fields.Datetime.now() - timedelta(days=days)
+        self.sudo().search([("date_start", "<", limit_date)]).unlink()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import secrets
+
+from odoo import fields, models, _
+
+
+class ResUsers(models.Model):
+    _inherit = "res.users"
+
+    # Jeton du flux ICS/NDJSON (/global_calendar/feed) ; lu uniquement en sudo
+    global_calendar_feed_token = fields.Char(
+        string="Global Calendar feed token",
+        copy=False,
+        index="btree_not_null",
+        groups="base.group_system",
+    )
+
+    def _get_global_calendar_feed_url(self, fmt="ics"):
+        self.ensure_one()
+        user = self.sudo()
+        if not user.global_calendar_feed_token:
+            user.global_calendar_feed_token = secrets.token_urlsafe(32)
+        base_url = self.get_base_url()
+        return "%s/global_calendar/feed/%s.%s" % (base_url, user.global_calendar_feed_token, fmt)
+
+    def action_global_calendar_feed_url(self):
+        """Affiche l'URL du flux de l'utilisateur courant."""
+        user = self.env.user
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Global Calendar feed"),
+                "message": _("ICS: %(ics)s\nNDJSON: %(ndjson)s",
+                             ics=user._get_global_calendar_feed_url("ics"),
+                             ndjson=user._get_global_calendar_feed_url("ndjson")),
+                "type": "info",
+                "sticky": True,
+            },
+        }
+
+    def action_global_calendar_feed_reset(self):
+        """Révoque l'URL actuelle du flux et en génère une nouvelle."""
+        self.env.user.sudo().global_calendar_feed_token = False
+        return self.action_global_calendar_feed_url()
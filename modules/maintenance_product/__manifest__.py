@@ -10,5 +10,6 @@
     "data": [
         "views/maintenance_equipment_view.xml",
         "views/product_template_view.xml",
+        "data/product_data.xml",
     ],
 }
@@ -13,9 +13,107 @@ class MaintenanceEquipment(models.Model):
         comodel_name="product.product",
         string="Product",
         tracking=True,
+        index="btree_not_null",
         domain="[('categ_id','=',product_category_id),('maintenance_ok','=',True)]",
     )
 
+    @api.model
+    def _get_product_default_fields(self):
+        """Fields filled from the product when it is set server-side."""
+        return {"name", "cost", "partner_id", "partner_ref"}
+
+    @api.model
+    def _get_product_defaults(self, product_ids, company=None):
+        """Name, cost, vendor and vendor reference for several products, as set by
+        ``_onchange_product_id``: products and their sellers are read once for the
+        whole batch. The vendor is the first seller of the variant (or of all
+        variants) available for the company.
+        """
+        company = company or self.env.company
+        products = self.env["product.product"].browse(
+            set(product_ids) - {None, False}
+        ).with_company(company)
+        sellers = products.seller_ids
+        defaults = {}
+        for product in products:
+            first_seller = fields.first(
+                sellers.filtered(
+                    lambda s, product=product: s.product_tmpl_id
+                    == product.product_tmpl_id
+                    and (not s.product_id or s.product_id == product)
+                    and (not s.company_id or s.company_id == company)
+                )
+            )
+            values = {"name": product.name, "cost": product.standard_price}
+            if first_seller:
+                values["partner_id"] = first_seller.partner_id.id
+                values["partner_ref"] = first_seller.product_code
+            defaults[product.id] = values
+        return defaults
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        allowed = self._get_product_default_fields()
+        product_ids_by_company = {}
+        for vals in vals_list:
+            product_ids_by_company.setdefault(
+                vals.get("company_id") or self.env.company.id, set()
+            ).add(vals.get("product_id"))
+        defaults = {
+            (company_id, product_id): values
+            for company_id, product_ids in product_ids_by_company.items()
+            for product_id, values in self._get_product_defaults(
+                product_ids, self.env["res.company"].browse(company_id)
+            ).items()
+        }
+        vals_list = [
+            dict(
+                vals,
+                **{
+                    key: value
+                    for key, value in defaults.get(
+                        (
+                            vals.get("company_id") or self.env.company.id,
+                            vals.get("product_id"),
+                        ),
+                        {},
+                    ).items()
+                    if key in allowed and not vals.get(key)
+                },
+            )
+            for vals in vals_list
+        ]
+        records = super().create(vals_list)
+        self.env["product.product"]._refresh_equipment_counts(records.product_id.ids)
+        return records
+
+    def write(self, vals):
+        if vals.get("product_id"):
+            allowed = self._get_product_default_fields()
+            company = self.company_id[:1] or self.env.company
+            defaults = self._get_product_defaults([vals["product_id"]], company)
+            vals = dict(
+                {
+                    key: value
+                    for key, value in defaults.get(vals["product_id"], {}).items()
+                    if key in allowed
+                },
+                **vals,
+            )
+        if "product_id" not in vals and "active" not in vals:
+            return super().write(vals)
+        old_products = self.product_id
+        res = super().write(vals)
+        self.env["product.product"]._refresh_equipment_counts(
+            (old_products | self.product_id).ids
+        )
+        return res
+
+    def unlink(self):
+        products = self.product_id
+        res = super().unlink()
+        self.env["product.product"]._refresh_equipment_counts(products.ids)
+        return res
 
     @api.onchange("product_id")
     def _onchange_product_id(self):
@@ -23,13 +121,14 @@ class MaintenanceEquipment(models.Model):
         to product ones.
         """
         if self.product_id:
-            self.name = self.product_id.name
-            self.cost = self.product_id.standard_price
-            if self.product_id.seller_ids:
-                first_seller = fields.first(self.product_id.seller_ids)
-                self.partner_id = first_seller.partner_id
-                self.partner_ref = first_seller.product_code
-
+            defaults = self._get_product_defaults(
+                [self.product_id.id], self.company_id or self.env.company
+            )[self.product_id.id]
+            self.name = defaults["name"]
+            self.cost = defaults["cost"]
+            if "partner_id" in defaults:
+                self.partner_id = defaults["partner_id"]
+                self.partner_ref = defaults["partner_ref"]
 
 class MaintenanceEquipmentCategory(models.Model):
     _inherit = "maintenance.equipment.category"
@@ -42,3 +141,25 @@ class MaintenanceEquipmentCategory(models.Model):
     def _onchange_product_category_id(self):
         if self.product_category_id:
             self.name = self.product_category_id.name
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        categories = self.env["product.category"].browse(
+            {vals.get("product_category_id") for vals in vals_list} - {None, False}
+        )
+        names = {category.id: category.name for category in categories}
+        vals_list = [
+            dict(vals, name=names[vals["product_category_id"]])
+            if vals.get("product_category_id") and not vals.get("name")
+            else vals
+            for vals in vals_list
+        ]
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if vals.get("product_category_id") and "name" not in vals:
+            vals = dict(
+                vals,
+                name=self.env["product.category"].browse(vals["product_category_id"]).name,
+            )
+        return super().write(vals)
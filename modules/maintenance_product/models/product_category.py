@@ -11,3 +11,53 @@ class ProductCategory(models.Model):
         inverse_name="product_category_id",
         string="Equipment Categories",
     )
+    equipment_count = fields.Integer(
+        string="Equipment Count",
+        readonly=True,
+        copy=False,
+        help="Number of active equipments linked to the products of this category "
+        "and of its child categories.",
+    )
+
+    def _refresh_equipment_counts(self):
+        """Recount these categories and all their parents from the template
+        counts of the whole sub-tree (one query through parent_path).
+        """
+        if not self:
+            return
+        self.flush_model(["parent_path"])
+        self.env["product.template"].flush_model(["equipment_count", "categ_id"])
+        category_ids = {
+            int(category_id)
+            for category in self
+            for category_id in category.parent_path.split("/")
+            if category_id
+        }
+        self.env.cr.execute(
+            """
+            SELECT c.id, COALESCE(SUM(t.equipment_count), 0)
+              FROM product_category c
+              JOIN product_category sub ON sub.parent_path LIKE c.parent_path || '%%'
+         LEFT JOIN product_template t ON t.categ_id = sub.id
+             WHERE c.id IN %s
+          GROUP BY c.id
+            """,
+            [tuple(category_ids)],
+        )
+        by_count = {}
+        for category_id, count in self.env.cr.fetchall():
+            by_count.setdefault(count, []).append(category_id)
+        categories = self.browse(category_ids)
+        for count, ids in by_count.items():
+            todo = categories.browse(ids).filtered(
+                lambda category, count=count: category.equipment_count != count
+            )
+            if todo:
+                todo.sudo().write({"equipment_count": count})
+
+    def write(self, vals):
+        old_parents = self.parent_id if "parent_id" in vals else self.browse()
+        res = super().write(vals)
+        if "parent_id" in vals:
+            (old_parents | self)._refresh_equipment_counts()
+        return res
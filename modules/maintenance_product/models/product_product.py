@@ -1,6 +1,6 @@
 # Copyright 2022 Tecnativa - Víctor Martínez
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class ProductProduct(models.Model):
@@ -11,3 +11,50 @@ class ProductProduct(models.Model):
         inverse_name="product_id",
         string="Equipments",
     )
+    equipment_count = fields.Integer(
+        string="Equipment Count",
+        readonly=True,
+        copy=False,
+        help="Number of active equipments linked to this variant. Kept up to date "
+        "when equipments are created, modified or deleted.",
+    )
+
+    @api.model
+    def _refresh_equipment_counts(self, product_ids):
+        """Recount the equipments of the given variants, then roll the counts up
+        to their templates and categories. Everything is done in a handful of
+        grouped queries, whatever the number of products.
+        """
+        products = self.browse(set(product_ids) - {False}).exists()
+        if not products:
+            return
+        counts = {
+            product.id: count
+            for product, count in self.env["maintenance.equipment"]
+            .sudo()
+            ._read_group(
+                [("product_id", "in", products.ids)],
+                groupby=["product_id"],
+                aggregates=["__count"],
+            )
+        }
+        by_count = {}
+        for product in products:
+            count = counts.get(product.id, 0)
+            if product.equipment_count != count:
+                by_count.setdefault(count, []).append(product.id)
+        for count, ids in by_count.items():
+            self.browse(ids).sudo().write({"equipment_count": count})
+        products.product_tmpl_id._refresh_equipment_counts()
+
+    @api.model
+    def _refresh_all_equipment_counts(self):
+        """Initial computation (module installation / update)."""
+        products = self.with_context(active_test=False).search([])
+        self._refresh_equipment_counts(products.ids)
+
+    def unlink(self):
+        templates = self.product_tmpl_id
+        res = super().unlink()
+        templates.exists()._refresh_equipment_counts()
+        return res
@@ -7,3 +7,49 @@ class ProductTemplate(models.Model):
     _inherit = "product.template"
 
     maintenance_ok = fields.Boolean(string="Can be Maintenance")
+    equipment_count = fields.Integer(
+        string="Equipment Count",
+        readonly=True,
+        copy=False,
+        help="Number of active equipments linked to the variants of this product.",
+    )
+
+    def _refresh_equipment_counts(self):
+        """Sum the variant counts and propagate to the product categories."""
+        if not self:
+            return
+        self.env["product.product"].flush_model(["equipment_count", "product_tmpl_id"])
+        sums = {
+            template.id: count
+            for template, count in self.env["product.product"]
+            .sudo()
+            .with_context(active_test=False)
+            ._read_group(
+                [("product_tmpl_id", "in", self.ids)],
+                groupby=["product_tmpl_id"],
+                aggregates=["equipment_count:sum"],
+            )
+        }
+        by_count = {}
+        for template in self:
+            count = sums.get(template.id) or 0
+            if template.equipment_count != count:
+                by_count.setdefault(count, []).append(template.id)
+        for count, ids in by_count.items():
+            self.browse(ids).sudo().write({"equipment_count": count})
+        self.categ_id._refresh_equipment_counts()
+
+    def write(self, vals):
+        old_categories = (
+            self.categ_id if "categ_id" in vals else self.env["product.category"]
+        )
+        res = super().write(vals)
+        if "categ_id" in vals:
+            (old_categories | self.categ_id)._refresh_equipment_counts()
+        return res
+
+    def unlink(self):
+        categories = self.categ_id
+        res = super().unlink()
+        categories.exists()._refresh_equipment_counts()
+        return res
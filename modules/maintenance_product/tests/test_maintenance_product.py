@@ -28,3 +28,64 @@ class TestMaintenanceProduct(TestMaintenanceProductBase):
         self.assertEqual(equipment_form.name, "test-product")
         self.assertEqual(equipment_form.cost, 10)
         self.assertEqual(equipment_form.partner_id, self.partner)
+
+    def test_equipment_counts(self):
+        child_category = self.env["product.category"].create(
+            {"name": "test-child-category", "parent_id": self.product_category.id}
+        )
+        product_2 = self.env["product.product"].create(
+            {
+                "name": "test-product-2",
+                "categ_id": child_category.id,
+                "maintenance_ok": True,
+            }
+        )
+        equipments = self.env["maintenance.equipment"].create(
+            [
+                {"name": "eq-1", "product_id": self.product.id},
+                {"name": "eq-2", "product_id": self.product.id},
+                {"name": "eq-3", "product_id": product_2.id},
+            ]
+        )
+        self.assertEqual(self.product.equipment_count, 2)
+        self.assertEqual(self.product.product_tmpl_id.equipment_count, 2)
+        self.assertEqual(product_2.equipment_count, 1)
+        self.assertEqual(child_category.equipment_count, 1)
+        self.assertEqual(self.product_category.equipment_count, 3)
+        equipments[1].product_id = product_2
+        self.assertEqual(self.product.equipment_count, 1)
+        self.assertEqual(child_category.equipment_count, 2)
+        equipments[2].active = False
+        self.assertEqual(product_2.equipment_count, 1)
+        equipments[0].unlink()
+        self.assertEqual(self.product.equipment_count, 0)
+        self.assertEqual(self.product_category.equipment_count, 1)
+        self.assertEqual(
+            self.env["product.template"].search_count(
+                [
+                    ("id", "=", self.product.product_tmpl_id.id),
+                    ("equipment_count", ">", 0),
+                ]
+            ),
+            0,
+        )
+
+    def test_maintenance_equipment_defaults_server_side(self):
+        self.product.seller_ids.product_code = "VENDOR-REF"
+        equipments = self.env["maintenance.equipment"].create(
+            [
+                {"product_id": self.product.id},
+                {"product_id": self.product.id, "name": "custom-name"},
+            ]
+        )
+        self.assertEqual(equipments.mapped("name"), ["test-product", "custom-name"])
+        self.assertEqual(equipments.mapped("cost"), [10, 10])
+        self.assertEqual(equipments.partner_id, self.partner)
+        self.assertEqual(equipments.mapped("partner_ref"), ["VENDOR-REF"] * 2)
+        self.equipment.write({"product_id": self.product.id})
+        self.assertEqual(self.equipment.name, "test-product")
+        self.assertEqual(self.equipment.partner_id, self.partner)
+        category = self.env["maintenance.equipment.category"].create(
+            {"product_category_id": self.product_category.id}
+        )
+        self.assertEqual(category.name, "test-product-category")